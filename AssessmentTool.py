@@ -32,29 +32,329 @@
 # Author = Anees Mohammed
 #
 
+import argparse
 import getpass
+import imp
+import importlib
+import os
 import pprint
-from networkAssessmentComponents import EapiAccess, Plotter, BgpValidate, MlagValidate
-
-# Read the list of switch IP addresses
-
-file_switches = "switches.txt"
-
-switches = []
-
-with open(file_switches) as readfile:
-    for line in readfile:
-        switches.append(line.strip())
-
-# Get the username and password to connect to switches
-
-my_username = raw_input("Enter your username: ")
-my_password = getpass.getpass("Enter your password: ")
-
-
-# Initiate the content for html file to write the assessment report
-
-my_report = """<!DOCTYPE html>
+from bgpPeerTable import BgpPeerTable
+from cablingPlan import CablingPlan
+from inventoryCache import InventoryCache
+from networkAssessmentComponents import Collector, Discovery, Fingerprint, EapiAccess, Plotter, BgpValidate, MlagValidate, Pipeline, CHECKS, Check
+from reportWriter import ReportWriter
+from requestScheduler import RequestScheduler, load_groups, parse_limits
+from runMetrics import RunMetrics
+from runState import RunState
+from shardedRun import merge_partials, parse_shard, run_shards, shard_switches
+from snapshotStore import SnapshotStore
+import topologyExport
+from switchHealth import CircuitBreaker
+
+# Read the command line options
+
+parser = argparse.ArgumentParser(
+    description="Post Deployment Network Validation")
+parser.add_argument("--inventory", metavar="FILE", default="switches.txt",
+                    help="file with the switch IP addresses, one per line "
+                         "(default: switches.txt)")
+parser.add_argument("--only", metavar="PHASES",
+                    help="comma separated phases to run, out of eapi, "
+                         "topology, bgp, mlag and the checks of "
+                         "--check-module (default: all). The topology "
+                         "phase also runs the eapi phase, which finds the "
+                         "switch hostnames")
+parser.add_argument("--skip", metavar="PHASES",
+                    help="comma separated phases not to run")
+parser.add_argument("--check-module", metavar="MODULE", action="append",
+                    help="python module adding checks with register_check, "
+                         "can be repeated")
+parser.add_argument("--workers", type=int, default=10,
+                    help="number of switches polled at the same time "
+                         "(default: 10). With the async eAPI client this "
+                         "is the number of requests kept in flight")
+parser.add_argument("--eapi-client", choices=["pyeapi", "async"],
+                    default="pyeapi",
+                    help="pyeapi uses one blocking connection per thread, "
+                         "async drives all the switches from one event loop")
+parser.add_argument("--eapi-transport", choices=["https", "http"],
+                    default="https",
+                    help="eAPI transport (default: https)")
+parser.add_argument("--eapi-port", type=int,
+                    help="eAPI TCP port (default: 443 for https, "
+                         "80 for http)")
+parser.add_argument("--discover", metavar="SEEDS",
+                    help="build the switch list by crawling the LLDP "
+                         "neighbors from the comma separated seed switches "
+                         "instead of reading switches.txt")
+parser.add_argument("--max-depth", type=int,
+                    help="number of LLDP hops crawled from the seeds "
+                         "(default: no limit)")
+parser.add_argument("--topology-format", action="append",
+                    choices=sorted(topologyExport.EXPORTERS),
+                    help="topology file to write, can be repeated "
+                         "(default: graphml). graphml: network.graphml, "
+                         "cytoscape: Cytoscape.js JSON network.cyjs, "
+                         "edgelist: tab separated network.tsv, "
+                         "parquet: network.parquet (needs pyarrow)")
+parser.add_argument("--bgp-table", metavar="FILE",
+                    help="save every BGP peer of the fleet in a columnar "
+                         "table in FILE (.npz, needs numpy), to query with "
+                         "bgpPeerTable.py")
+parser.add_argument("--cabling-plan", metavar="FILE",
+                    help="CSV file of the planned links (device, port, "
+                         "peer device, peer port, speed in Gbps) to check "
+                         "the LLDP topology against")
+parser.add_argument("--state", metavar="FILE",
+                    help="save the per switch results of the run to FILE")
+parser.add_argument("--incremental", action="store_true",
+                    help="validate again only the switches whose "
+                         "configuration or LLDP neighbors changed, or that "
+                         "failed, since the run saved in --state")
+parser.add_argument("--pipeline", action="store_true",
+                    help="collect, parse and report the switches as a "
+                         "stream, keeping at most --queue-size switches of "
+                         "EOS command outputs in memory")
+parser.add_argument("--queue-size", type=int, default=100,
+                    help="switches held between the stages of the "
+                         "pipeline (default: 100)")
+parser.add_argument("--inventory-cache", metavar="FILE",
+                    help="keep the hostname and the failures of every "
+                         "switch in FILE, so that later runs do not ask "
+                         "the switches for their hostname")
+parser.add_argument("--cache-expiry", type=float, default=86400,
+                    help="seconds a hostname of the inventory cache is "
+                         "used after the switch was last reached "
+                         "(default: 86400)")
+parser.add_argument("--shard", metavar="I/N",
+                    help="assess only the I-th of N shards of the switch "
+                         "list, such as 2/4, to split a run across hosts")
+parser.add_argument("--partial", metavar="FILE",
+                    help="save the per switch results of the shard to "
+                         "FILE, for --merge")
+parser.add_argument("--merge", metavar="FILE", nargs="+",
+                    help="write the report and the topology from the "
+                         "--partial files of the shards, without "
+                         "connecting to the switches")
+parser.add_argument("--processes", type=int,
+                    help="split the switch list in this many shards, "
+                         "assess each one in its own process and merge "
+                         "their results")
+parser.add_argument("--timeout", type=float, default=30,
+                    help="seconds to wait for a switch to answer an eAPI "
+                         "request (default: 30)")
+parser.add_argument("--retries", type=int, default=2,
+                    help="times a request failing with a connection error "
+                         "is sent again, with jittered exponential backoff "
+                         "(default: 2)")
+parser.add_argument("--failure-threshold", type=int, default=3,
+                    help="connection failures in a row after which a "
+                         "switch is skipped for the rest of the run "
+                         "(default: 3)")
+parser.add_argument("--max-requests", type=int,
+                    help="eAPI requests running at the same time across "
+                         "all the switches (default: no limit other than "
+                         "--workers)")
+parser.add_argument("--switch-rate", type=float,
+                    help="cost units per second each switch may receive, "
+                         "a light show command costs 1 and show "
+                         "running-config 10 (default: no limit)")
+parser.add_argument("--switch-burst", type=float,
+                    help="cost units a switch may receive at once "
+                         "(default: --switch-rate)")
+parser.add_argument("--groups", metavar="FILE",
+                    help="CSV file of switch,group lines, for "
+                         "--group-limit")
+parser.add_argument("--group-limit", metavar="GROUP=N", action="append",
+                    help="eAPI requests running at the same time to the "
+                         "switches of a group of --groups, such as "
+                         "spine=4, can be repeated")
+parser.add_argument("--command-cost", metavar="COMMAND=COST",
+                    action="append",
+                    help="cost of an EOS command against --switch-rate, "
+                         "can be repeated")
+parser.add_argument("--metrics", metavar="NAME",
+                    help="write the connect, request and parse timings to "
+                         "NAME.json and NAME.prom (Prometheus text format)")
+snapshot_mode = parser.add_mutually_exclusive_group()
+snapshot_mode.add_argument("--record", metavar="DIR",
+                           help="save every eAPI response in a snapshot "
+                                "directory")
+snapshot_mode.add_argument("--replay", metavar="DIR",
+                           help="run the assessment from a snapshot "
+                                "directory without connecting to the "
+                                "switches")
+args = parser.parse_args()
+
+# Import the modules of the extra checks, they register their checks
+# when imported
+
+for check_module in args.check_module or []:
+    try:
+        importlib.import_module(check_module)
+    except (ImportError, ValueError) as exc:
+        parser.error("cannot import the check module %s: %s"
+                     % (check_module, exc))
+
+# Phases of the assessment, in the order they run
+
+PHASES = [check.report_phase for check in CHECKS]
+
+
+def parse_phases(value):
+    phases = [phase.strip() for phase in value.split(",") if phase.strip()]
+    for phase in phases:
+        if phase not in PHASES:
+            parser.error("unknown phase %s, the phases are %s"
+                         % (phase, ", ".join(PHASES)))
+    return phases
+
+
+def module_available(name):
+    """
+    Returns True if the optional module is installed, without paying for
+        its import
+    """
+    try:
+        imp.find_module(name)
+    except ImportError:
+        return False
+    return True
+
+phases = parse_phases(args.only) if args.only else list(PHASES)
+if args.skip:
+    skipped = parse_phases(args.skip)
+    phases = [phase for phase in phases if phase not in skipped]
+if "topology" in phases and "eapi" not in phases:
+    phases.append("eapi")
+# The phases run in their own order, whatever the order of --only
+phases = [phase for phase in PHASES if phase in phases]
+if not phases:
+    parser.error("no phase left to run")
+if args.cabling_plan and "topology" not in phases:
+    parser.error("--cabling-plan needs the topology phase")
+cabling_plan = None
+if args.cabling_plan:
+    try:
+        cabling_plan = CablingPlan.load(args.cabling_plan)
+    except (IOError, ValueError) as exc:
+        parser.error(str(exc))
+if args.bgp_table and "bgp" not in phases:
+    parser.error("--bgp-table needs the bgp phase")
+if args.bgp_table and not module_available("numpy"):
+    parser.error("--bgp-table needs the numpy module")
+if args.state and set(phases) != set(PHASES):
+    parser.error("--state needs all the phases")
+if args.discover and args.replay:
+    parser.error("--discover cannot be used with --replay")
+if args.state and args.replay:
+    parser.error("--state cannot be used with --replay")
+if args.incremental and not args.state:
+    parser.error("--incremental needs the --state file of a previous run")
+if args.shard:
+    try:
+        args.shard = parse_shard(args.shard)
+    except ValueError:
+        parser.error("--shard takes I/N, with I from 1 to N")
+if args.processes is not None and args.processes < 1:
+    parser.error("--processes needs at least one process")
+if (args.shard or args.processes) and (args.discover or args.incremental):
+    parser.error("--shard and --processes cannot be used with --discover "
+                 "or --incremental")
+if args.processes and (args.shard or args.partial):
+    parser.error("--processes runs the shards itself, without --shard or "
+                 "--partial")
+if args.metrics and (args.merge or args.processes):
+    parser.error("--metrics cannot be used with --merge or --processes, "
+                 "the switches are polled by the shards, use it with "
+                 "--shard instead")
+if args.inventory_cache and (args.replay or args.merge or args.processes):
+    parser.error("--inventory-cache cannot be used with --replay, --merge "
+                 "or --processes")
+if args.switch_rate is not None and args.switch_rate <= 0:
+    parser.error("--switch-rate must be more than 0")
+if args.group_limit and not args.groups:
+    parser.error("--group-limit needs the --groups file")
+
+try:
+    group_limits = parse_limits(args.group_limit, "--group-limit", int)
+    command_costs = parse_limits(args.command_cost, "--command-cost", float)
+except ValueError as exc:
+    parser.error(str(exc))
+groups = {}
+if args.groups:
+    try:
+        groups = load_groups(args.groups)
+    except (IOError, ValueError) as exc:
+        parser.error(str(exc))
+if args.merge and (args.replay or args.record or args.discover or
+                   args.incremental or args.shard or args.processes):
+    parser.error("--merge only reads the partial files, it cannot be used "
+                 "with --replay, --record, --discover, --incremental, "
+                 "--shard or --processes")
+if not args.topology_format:
+    args.topology_format = ["graphml"]
+if "parquet" in args.topology_format and not module_available("pyarrow"):
+    parser.error("the parquet topology format needs the pyarrow module")
+
+if args.merge:
+
+    # The switches and their results come from the partial files
+
+    switches = []
+    my_username = my_password = None
+
+elif args.replay:
+
+    # The switches and their responses come from the snapshot
+
+    snapshot = SnapshotStore(args.replay)
+    switches = snapshot.switches()
+    my_username = my_password = None
+
+elif args.discover:
+
+    # Start from the seed switches, the others are found by discovery
+
+    switches = [seed.strip() for seed in args.discover.split(",")
+                if seed.strip()]
+
+else:
+
+    # Read the list of switch IP addresses
+
+    file_switches = args.inventory
+
+    switches = []
+
+    with open(file_switches) as readfile:
+        for line in readfile:
+            if line.strip():
+                switches.append(line.strip())
+
+if args.shard:
+
+    # The other shards are assessed by other invocations
+
+    switches = shard_switches(switches, *args.shard)
+
+if not args.replay and not args.merge:
+
+    # Get the username and password to connect to switches
+    # EAPI_USERNAME and EAPI_PASSWORD skip the prompts for unattended runs
+
+    my_username = (os.environ.get("EAPI_USERNAME") or
+                   raw_input("Enter your username: "))
+    my_password = (os.environ.get("EAPI_PASSWORD") or
+                   getpass.getpass("Enter your password: "))
+
+
+# Start the assessment report. Each switch is written to the HTML and
+# NDJSON reports as soon as its result is known.
+
+report = ReportWriter("network_validation.html", "network_validation.ndjson",
+                      spool_sections=args.pipeline, header=
+                      """<!DOCTYPE html>
 <html>
 <head>
 <title>Post Deployment Network Validation</title>
@@ -64,115 +364,454 @@ my_report = """<!DOCTYPE html>
 <p>
 This report shows if the state of the BGP neighbor is not in the "Established" state.
 BGP neighbor state is verified against the configured BGP neighbors under each VRF.
-This report is generated only for ipv4 neighbors.
+This report is generated for ipv4 and ipv6 neighbors.
 The report also shows the state of MLAG control plane and the port channels.
 </p>
-"""
-
-# Write a reusable function to write html report
-
-def write_report(my_report, result):
-    for each_switch in result:
-        my_report += "<p>"
-        my_report += each_switch + " :  " + str(result[each_switch])
-        my_report += "</p>"
-
-    return my_report
-
-# Verify the eAPI connectivity to the switches.
-# Remove the switches that has eAPI connectivity issue from the list
-
-print "Validating eAPI connectivity to the switches"
-
-device_eapi_access = EapiAccess(switches, my_username, my_password)
-device_eapi_access.validate_switches()
-switches = device_eapi_access.get_hostnames()
-
-# Draw Physical Topology
-
-print "Working on Drawing Physical Topology"
-
-network_topology = Plotter(switches, my_username, my_password)
-network_topology.draw()
-
-print "Physical Topology is drawn."
-
-# BGP Assessment
-
-print "Working on BGP Assessment"
-bgp_assessment = BgpValidate(switches, my_username, my_password)
-bgp_assessment.bgp_validate()
-
-if bool(bgp_assessment.get_bgp_status()):
-    pprint.pprint(bgp_assessment.get_bgp_status())
-    result = bgp_assessment.get_bgp_status()
-    my_report += """ <h1>BGP Validation</h1>
-    """
-    for each_switch in result:
-        my_report += "<h2>" + str(each_switch) + "</h2>"
-        if isinstance(result[each_switch], dict):
-            for each_vrf in result[each_switch]:
-                my_report += "<h3>" + str(each_vrf) + "</h3>"
-                my_report = write_report(my_report, result[each_switch][each_vrf])
+""")
+
+metrics = RunMetrics() if args.metrics else None
+
+# Switches failing args.failure_threshold times in a row are marked
+# unhealthy and skipped by the later phases
+
+breaker = CircuitBreaker(args.failure_threshold)
+
+# Every eAPI request of the run goes through the scheduler, which keeps
+# the load on the switches within the limits of the command line
+
+scheduler = RequestScheduler(args.max_requests, args.switch_rate,
+                             args.switch_burst, groups, group_limits,
+                             command_costs)
+
+# Results of the previous run kept for the unchanged switches
+
+previous_state = RunState.load(args.state) if args.incremental else None
+previous = {}
+merged_order = []
+fingerprints = {}
+
+# Hostnames and failure history of the switches from the previous runs
+
+inventory_cache = (InventoryCache.load(args.inventory_cache,
+                                       args.cache_expiry)
+                   if args.inventory_cache else None)
+known_hostnames = {}
+
+try:
+
+    # Collect every EOS command needed by the assessment in one request
+    # per switch. All the phases below work from the collected responses.
+
+    record = SnapshotStore(args.record) if args.record else None
+
+    if args.merge or args.processes:
+
+        # Every switch comes from the partial results of the shards, and
+        # is reported like the unchanged switches of an incremental run
+
+        if args.processes:
+            print "Assessing the switches in %d processes" % args.processes
+            shard_args = ["--only", ",".join(phases),
+                          "--workers", str(args.workers),
+                          "--eapi-client", args.eapi_client,
+                          "--eapi-transport", args.eapi_transport,
+                          "--timeout", str(args.timeout),
+                          "--retries", str(args.retries),
+                          "--failure-threshold", str(args.failure_threshold)]
+            if args.replay:
+                shard_args += ["--replay", os.path.abspath(args.replay)]
+            else:
+                shard_args += ["--inventory", os.path.abspath(args.inventory)]
+            if args.record:
+                shard_args += ["--record", os.path.abspath(args.record)]
+            if args.eapi_port:
+                shard_args += ["--eapi-port", str(args.eapi_port)]
+            for check_module in args.check_module or []:
+                shard_args += ["--check-module", check_module]
+
+            # The limits of the scheduler apply within each process
+            if args.max_requests:
+                shard_args += ["--max-requests", str(args.max_requests)]
+            if args.switch_rate:
+                shard_args += ["--switch-rate", str(args.switch_rate)]
+            if args.switch_burst:
+                shard_args += ["--switch-burst", str(args.switch_burst)]
+            if args.groups:
+                shard_args += ["--groups", os.path.abspath(args.groups)]
+            for option, values in (("--group-limit", args.group_limit),
+                                   ("--command-cost", args.command_cost)):
+                for value in values or []:
+                    shard_args += [option, value]
+            if args.pipeline:
+                shard_args += ["--pipeline",
+                               "--queue-size", str(args.queue_size)]
+            environment = dict(os.environ)
+            if not args.replay:
+                environment.update(EAPI_USERNAME=my_username,
+                                   EAPI_PASSWORD=my_password)
+            merged = run_shards(os.path.abspath(__file__), shard_args,
+                                args.processes, environment)
         else:
-            my_report += "<p>" + str(result[each_switch]) + "</p>"
-
-    print "BGP Assessment Completed."
-
-# MLAG Assessment
-print "Working on MLAG Assessment"
-mlag_assessment = MlagValidate(switches, my_username, my_password)
-mlag_assessment.mlag_validate()
-
-if bool(mlag_assessment.mlag_status):
-    pprint.pprint(mlag_assessment.mlag_status)
-    result = mlag_assessment.get_mlag_status()
-    my_report += """ <h1>MLAG Validation</h1>
-    """
-    for each_switch in result:
-        my_report += "<h2>" + str(each_switch) + "</h2>"
-        if isinstance(result[each_switch], dict):
-            my_report = write_report(my_report, result[each_switch])
+            merged = merge_partials(args.merge)
+        previous = merged.switches
+
+        # The errors of the merged switches are reported in the order of
+        # the inventory, like a run in one process reports them
+        merged_order = [switch for switch in switches if switch in previous]
+        merged_order += sorted(set(previous) - set(merged_order))
+        switches = []
+        nodes = {}
+        print "Merging the results of %d switches" % len(previous)
+
+    elif args.replay:
+        print "Replaying EOS command outputs from " + args.replay
+        nodes = snapshot.nodes()
+
+    else:
+        if args.discover:
+
+            # Crawl the LLDP neighbors from the seeds. The discovered
+            # switches are assessed like the ones of switches.txt
+
+            print "Discovering the switches from " + args.discover
+            discovery = Discovery(switches, my_username, my_password,
+                                  args.workers, args.eapi_client,
+                                  transport=args.eapi_transport,
+                                  port=args.eapi_port, metrics=metrics,
+                                  timeout=args.timeout, retries=args.retries,
+                                  breaker=breaker, scheduler=scheduler)
+            switches = discovery.discover(args.max_depth)
+
+            with open("discovered_switches.txt", "w") as writefile:
+                for switch in switches:
+                    writefile.write(switch + "\n")
+            print "Discovered %d switches, saved in discovered_switches.txt" \
+                % len(switches)
+
+            if bool(discovery.get_unresolved()):
+                print "LLDP neighbors without a management address:"
+                pprint.pprint(discovery.get_unresolved())
+
+        if args.incremental:
+
+            # Only the switches whose configuration or LLDP neighbors
+            # changed, or that failed in the previous run, are validated
+            # again. The others keep the results of the previous run
+
+            print "Comparing the switches with the previous run"
+            fingerprint = Fingerprint(switches, my_username, my_password,
+                                      args.workers, args.eapi_client,
+                                      transport=args.eapi_transport,
+                                      port=args.eapi_port, metrics=metrics,
+                                      timeout=args.timeout,
+                                      retries=args.retries, breaker=breaker,
+                                      scheduler=scheduler)
+            fingerprint.fingerprint()
+            fingerprints = fingerprint.get_fingerprints()
+            for switch in previous_state.unchanged(fingerprints):
+                previous[switch] = previous_state.switches[switch]
+            switches = [switch for switch in switches
+                        if switch not in previous]
+            print "%d switches to validate, %d unchanged since the " \
+                "previous run" % (len(switches), len(previous))
+
+        if inventory_cache is not None:
+
+            # The hostnames of the cache spare the show hostname command,
+            # unless the eAPI connectivity is the only thing to check
+
+            switches = inventory_cache.order(switches)
+            if len(phases) > 1:
+                known_hostnames = inventory_cache.hostnames(switches)
+                print "%d of %d hostnames found in %s" % (
+                    len(known_hostnames), len(switches),
+                    args.inventory_cache)
+
+        # Filled by the Collector below
+        nodes = {}
+
+    # The Use Cases of the phases. In a pipeline run, every one of them
+    # gets the collected responses of one switch at a time
+
+    phase_nodes = None if args.pipeline else nodes
+    device_eapi_access = EapiAccess(switches, my_username, my_password,
+                                   args.workers, args.eapi_client,
+                                   phase_nodes, report=report,
+                                   metrics=metrics, breaker=breaker,
+                                   known_hostnames=known_hostnames)
+    network_topology = Plotter(switches, my_username, my_password,
+                               args.workers, args.eapi_client, phase_nodes,
+                               report=report, metrics=metrics,
+                               breaker=breaker, formats=args.topology_format)
+    bgp_assessment = BgpValidate(switches, my_username, my_password,
+                                 args.workers, args.eapi_client, phase_nodes,
+                                 report=report, metrics=metrics,
+                                 breaker=breaker)
+    mlag_assessment = MlagValidate(switches, my_username, my_password,
+                                   args.workers, args.eapi_client,
+                                   phase_nodes, report=report,
+                                   metrics=metrics, breaker=breaker)
+
+    # The checks plugged in with register_check need no code of their own
+    # here, they are run, restored and printed by the loop further down
+
+    checks = []
+    for check in CHECKS:
+        if issubclass(check, Check) and check.report_phase in phases:
+            checks.append(check(switches, my_username, my_password,
+                                args.workers, args.eapi_client, phase_nodes,
+                                report=report, metrics=metrics,
+                                breaker=breaker))
+            report.add_section(check.report_phase, check.report_title,
+                               check.error_title)
+
+    use_case_of_phase = {"eapi": device_eapi_access,
+                         "topology": network_topology,
+                         "bgp": bgp_assessment,
+                         "mlag": mlag_assessment}
+    for check in checks:
+        use_case_of_phase[check.report_phase] = check
+    phase_use_cases = [use_case_of_phase[phase] for phase in phases]
+    run_use_cases = list(phase_use_cases)
+    if args.state and not args.incremental:
+        fingerprint = Fingerprint(switches, my_username, my_password,
+                                  args.workers, args.eapi_client,
+                                  phase_nodes)
+        run_use_cases.append(fingerprint)
+
+    if switches and not args.replay and not args.pipeline:
+        print "Collecting EOS command outputs from the switches"
+
+        collector = Collector(switches, my_username, my_password,
+                              args.workers, args.eapi_client, nodes,
+                              snapshot=record, transport=args.eapi_transport,
+                              port=args.eapi_port, metrics=metrics,
+                              timeout=args.timeout, retries=args.retries,
+                              breaker=breaker, scheduler=scheduler)
+        collector.collect(run_use_cases)
+
+    # eAPI errors of the merged switches
+
+    for switch in merged_order:
+        for use_case in phase_use_cases:
+            error = previous[switch]["errors"].get(use_case.report_phase)
+            if error is not None:
+                use_case.errors[switch] = error
+                report.write_error(use_case.report_phase, switch, error)
+
+    validated_switches = list(switches)
+
+    if args.pipeline:
+
+        # Collect, parse and report every switch as a stream
+
+        print "Running the assessment pipeline on the switches"
+
+        # The topology names every switch after the hostname found by
+        # the eAPI check of the same switch
+        network_topology.devices = device_eapi_access.get_hostnames()
+
+        pipeline = Pipeline(switches, my_username, my_password,
+                            args.workers, args.eapi_client, nodes,
+                            snapshot=record, transport=args.eapi_transport,
+                            port=args.eapi_port, metrics=metrics,
+                            timeout=args.timeout, retries=args.retries,
+                            breaker=breaker, scheduler=scheduler,
+                            queue_size=args.queue_size)
+        pipeline.run(run_use_cases)
+
+    elif args.state and not args.incremental:
+        fingerprint.fingerprint()
+
+    if args.state and not args.incremental:
+        fingerprints = fingerprint.get_fingerprints()
+
+    if "eapi" in phases:
+
+        # Verify the eAPI connectivity to the switches.
+        # Remove the switches that has eAPI connectivity issue from the list
+
+        if not args.pipeline:
+            print "Validating eAPI connectivity to the switches"
+            device_eapi_access.validate_switches()
+        switches = device_eapi_access.get_hostnames()
+
+        if bool(device_eapi_access.errors):
+            print "There are connectivity issues with some of the switches."
+            pprint.pprint(device_eapi_access.errors)
+
+    else:
+
+        # Without the eAPI check, every switch is assessed under its
+        # address
+
+        switches = dict((switch, switch) for switch in switches)
+
+    if "topology" in phases:
+
+        # Draw Physical Topology
+
+        known_edges = dict(
+            (switch, (previous[switch]["hostname"], previous[switch]["edges"]))
+            for switch in previous)
+        if args.pipeline:
+            network_topology.write_topology(known_edges)
         else:
-            my_report += "<p>" + str(result[each_switch]) + "</p>"
-
-    print "MLAG Assessment Completed."
-
-
-# Prepare to write a report
-
-if bool(device_eapi_access.errors) or bool(network_topology.errors) or bool(bgp_assessment.errors):
-    my_report += """ <h1>eAPI Access Issues</h1>
-    """
-
-if bool(device_eapi_access.errors):
-    print "There are connectivity issues with some of the switches."
-    pprint.pprint(device_eapi_access.errors)
-    my_report += "<h2>eAPI or Switch Connectivity Issues</h2>"
-    result = device_eapi_access.errors
-    my_report = write_report(my_report, result)
-
-if bool(network_topology.errors):
-    print "There are connectivity issues with some of the switches."
-    pprint.pprint(network_topology.errors)
-    my_report += "<h2>Network Topology Related EOS Commands Error</h2>"
-    result = network_topology.errors
-    my_report = write_report(my_report, result)
-
-if bool(bgp_assessment.errors):
-    pprint.pprint(bgp_assessment.errors)
-    my_report += "<h2>BGP Assessment Related EOS Commands Error</h2>"
-    result = bgp_assessment.errors
-    my_report = write_report(my_report, result)
-
-if bool(mlag_assessment.errors):
-    pprint.pprint(mlag_assessment.errors)
-    my_report += "<h2>MLAG Assessment Related EOS Commands Error</h2>"
-    result = mlag_assessment.errors
-    my_report = write_report(my_report, result)
-
-
-# Writing the content to HTML File for Reporting
-
-with open("network_validation.html", "w") as writefile:
-    writefile.write(my_report)
+            print "Working on Drawing Physical Topology"
+            network_topology.devices = switches
+            network_topology.draw(known_edges)
+
+        print "Physical Topology is drawn."
+
+        if bool(network_topology.errors):
+            print "There are connectivity issues with some of the switches."
+            pprint.pprint(network_topology.errors)
+
+        # Cabling Plan Validation
+
+        if cabling_plan is not None:
+            print "Checking the topology against the cabling plan"
+            cabling_issues = cabling_plan.compare(
+                network_topology.get_links())
+            report.write_section("cabling", cabling_issues)
+            for heading, entries in cabling_issues:
+                print "%s: %d" % (heading, len(entries))
+                if entries:
+                    pprint.pprint(entries)
+
+    if "bgp" in phases:
+
+        # BGP Assessment
+
+        if not args.pipeline:
+            print "Working on BGP Assessment"
+            bgp_assessment.devices = switches
+            bgp_assessment.bgp_validate()
+        bgp_assessment.restore(dict(
+            (switch, (previous[switch]["bgp"],
+                      previous[switch]["bgp_payload"],
+                      previous[switch].get("bgp_peers", [])))
+            for switch in previous))
+
+        payload_sizes = bgp_assessment.get_payload_sizes()
+        print "Collected %d bytes of BGP configuration from %d switches" \
+            % (sum(payload_sizes.values()), len(payload_sizes))
+
+        if bool(bgp_assessment.get_bgp_status()):
+            pprint.pprint(bgp_assessment.get_bgp_status())
+            print "BGP Assessment Completed."
+
+        if bool(bgp_assessment.errors):
+            pprint.pprint(bgp_assessment.errors)
+
+        # Fleet wide table of the BGP peers
+
+        if args.bgp_table:
+            peer_table = BgpPeerTable.from_peers(
+                bgp_assessment.get_bgp_peers())
+            peer_table.save(args.bgp_table)
+            down = peer_table.not_established()
+            print "%d BGP peers saved in %s, %d not Established" \
+                % (len(peer_table), args.bgp_table, down.sum())
+            if down.any():
+                print "Peers not Established by state:"
+                pprint.pprint(peer_table.count_by("state", down))
+                print "Remote ASNs with the most peers not Established:"
+                pprint.pprint(peer_table.count_by("asn", down)[:10])
+
+    if "mlag" in phases:
+
+        # MLAG Assessment
+
+        if not args.pipeline:
+            print "Working on MLAG Assessment"
+            mlag_assessment.devices = switches
+            mlag_assessment.mlag_validate()
+        mlag_assessment.restore(dict((switch, previous[switch]["mlag"])
+                                     for switch in previous))
+
+        if bool(mlag_assessment.mlag_status):
+            pprint.pprint(mlag_assessment.mlag_status)
+            print "MLAG Assessment Completed."
+
+        if bool(mlag_assessment.errors):
+            pprint.pprint(mlag_assessment.errors)
+
+    for check in checks:
+
+        # Checks plugged in with register_check
+
+        if not args.pipeline:
+            print "Working on " + check.report_title
+            check.devices = switches
+            check.run_check()
+        check.restore(dict(
+            (switch, previous[switch].get("checks", {}).get(
+                check.report_phase))
+            for switch in previous))
+
+        if bool(check.get_results()):
+            pprint.pprint(check.get_results())
+            print check.report_title + " Completed."
+
+        if bool(check.errors):
+            pprint.pprint(check.errors)
+
+    # Remember the hostname of the switches reached by this run and the
+    # failures of the others
+
+    if inventory_cache is not None:
+        for switch in validated_switches:
+            failures = [use_case.errors[switch]
+                        for use_case in phase_use_cases
+                        if str(use_case.errors.get(switch)).startswith(
+                            "ConnectionError")]
+            if failures:
+                inventory_cache.record_failure(switch, failures[0])
+            elif "eapi" in phases and switch in switches:
+                inventory_cache.record_success(switch, switches[switch])
+        inventory_cache.save(args.inventory_cache)
+
+    # Save the results of every switch for the next incremental run, or
+    # for the merge of the shards
+
+    if args.state or args.partial:
+        state = RunState(previous)
+        edges = network_topology.get_edges()
+        for switch in validated_switches:
+            errors = {}
+            for use_case in phase_use_cases:
+                if switch in use_case.errors:
+                    errors[use_case.report_phase] = use_case.errors[switch]
+            state.record(switch, fingerprints.get(switch, (None, [])),
+                         hostname=switches.get(switch),
+                         edges=edges[switch][1] if switch in edges else [],
+                         bgp=bgp_assessment.get_bgp_status().get(switch),
+                         bgp_payload=bgp_assessment.get_payload_sizes().get(
+                             switch, 0),
+                         bgp_peers=bgp_assessment.get_bgp_peers().get(
+                             switch),
+                         mlag=mlag_assessment.mlag_status.get(switch),
+                         checks=dict(
+                             (check.report_phase,
+                              check.get_results().get(switch))
+                             for check in checks),
+                         errors=errors)
+        for state_file in (args.state, args.partial):
+            if state_file:
+                state.save(state_file)
+                print "Results of %d switches saved in %s" \
+                    % (len(state.switches), state_file)
+
+finally:
+
+    # Write the eAPI Access Issues section and close the reports, also
+    # when the run is interrupted
+
+    report.close()
+
+    if metrics is not None:
+        metrics.write_json(args.metrics + ".json")
+        metrics.write_prometheus(args.metrics + ".prom")
+        print "Timings written to %s.json and %s.prom" \
+            % (args.metrics, args.metrics)
@@ -0,0 +1,412 @@
+# Copyright (c) 2016, Arista Networks, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+#   Neither the name of Arista Networks nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL ARISTA NETWORKS
+# BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+# BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
+# IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#
+# Author = Anees Mohammed
+#
+
+import base64
+import errno
+import json
+import select
+import socket
+import ssl
+import time
+
+import pyeapi
+
+
+class _EapiRequest(object):
+
+    """
+        State of one eAPI JSON-RPC request handled by AsyncEapiClient
+    """
+
+    def __init__(self, switch, commands, payload, transport, port, deadline):
+        self.switch = switch
+        self.commands = commands
+        self.payload = payload
+        self.transport = transport
+        self.port = port
+        self.deadline = deadline
+        self.started = time.time()
+        self.connected = None
+        self.scheduled = False
+        self.sock = None
+        self.state = "connect"
+        self.response = []
+        self.received = 0
+        self.header_length = None
+        self.content_length = None
+
+    def wants_write(self):
+        return self.state in ("connect", "handshake_write", "send")
+
+
+class AsyncEapiClient(object):
+
+    """
+        Single threaded eAPI client that keeps many JSON-RPC requests
+            in flight using non blocking sockets and poll/select
+        The response of every request has the same shape as the one
+            returned by pyeapi connection execute method, and failures
+            are reported with the pyeapi ConnectionError and CommandError
+            exceptions
+        With a RequestScheduler, a request is only started once the
+            scheduler allows it, the others wait without blocking the
+            requests in flight
+    """
+
+    def __init__(self, username, password, transport="https", port=None,
+                 timeout=60, max_in_flight=500, metrics=None, scheduler=None):
+        self.transport = transport
+        self.metrics = metrics
+        self.scheduler = scheduler
+        self.port = port or (443 if transport == "https" else 80)
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.addresses = {}
+        self.auth = base64.b64encode("%s:%s" % (username, password))
+        if transport == "https":
+            self.context = ssl._create_unverified_context()
+
+    def _payload(self, commands):
+        body = json.dumps({"jsonrpc": "2.0",
+                           "method": "runCmds",
+                           "params": {"version": 1,
+                                      "cmds": commands,
+                                      "format": "json"},
+                           "id": "AsyncEapiClient"})
+        return ("POST /command-api HTTP/1.0\r\n"
+                "Content-type: application/json-rpc\r\n"
+                "Content-length: %d\r\n"
+                "Authorization: Basic %s\r\n"
+                "\r\n%s" % (len(body), self.auth, body))
+
+    def _resolve(self, switch):
+        """
+        Returns the (family, sockaddr) to connect to the switch, an IPv4
+            or IPv6 address or a name, which is looked up once per client
+        Raises socket.gaierror when the name cannot be resolved
+        """
+        if switch not in self.addresses:
+            family, _, _, _, sockaddr = socket.getaddrinfo(
+                switch, self.port, socket.AF_UNSPEC, socket.SOCK_STREAM)[0]
+            self.addresses[switch] = (family, sockaddr)
+        return self.addresses[switch]
+
+    def _request(self, switch, commands):
+        return _EapiRequest(switch, commands, self._payload(commands),
+                            self.transport, self.port,
+                            time.time() + self.timeout)
+
+    def _start(self, request):
+        family, sockaddr = self._resolve(request.switch)
+        # The scheduler has admitted the request, the connect time is
+        # counted from here
+        request.started = time.time()
+        request.sock = socket.socket(family, socket.SOCK_STREAM)
+        request.sock.setblocking(0)
+        result = request.sock.connect_ex(sockaddr)
+        if result not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+            raise socket.error(result, errno.errorcode.get(result, result))
+
+    def _step(self, request):
+        """
+        Moves one request forward as far as it can go without blocking
+        Returns True when the response is completely received
+        """
+        if request.state == "connect":
+            result = request.sock.getsockopt(socket.SOL_SOCKET,
+                                             socket.SO_ERROR)
+            if result:
+                raise socket.error(result, errno.errorcode.get(result, result))
+            if self.transport == "https":
+                request.sock = self.context.wrap_socket(
+                    request.sock, do_handshake_on_connect=False)
+                request.state = "handshake_write"
+            else:
+                request.state = "send"
+                self._connected(request)
+
+        if request.state in ("handshake_read", "handshake_write"):
+            try:
+                request.sock.do_handshake()
+                request.state = "send"
+                self._connected(request)
+            except ssl.SSLWantReadError:
+                request.state = "handshake_read"
+                return False
+            except ssl.SSLWantWriteError:
+                request.state = "handshake_write"
+                return False
+
+        if request.state == "send":
+            try:
+                sent = request.sock.send(request.payload)
+            except (ssl.SSLWantReadError, ssl.SSLWantWriteError):
+                return False
+            except socket.error as exc:
+                if exc.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return False
+                raise
+            request.payload = request.payload[sent:]
+            if request.payload:
+                return False
+            request.state = "receive"
+
+        if request.state == "receive":
+            while True:
+                try:
+                    data = request.sock.recv(65536)
+                except (ssl.SSLWantReadError, ssl.SSLWantWriteError):
+                    return False
+                except ssl.SSLEOFError:
+                    return True
+                except socket.error as exc:
+                    if exc.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                        return False
+                    raise
+                if not data:
+                    return True
+                request.response.append(data)
+                if self._complete(request):
+                    return True
+
+        return False
+
+    def _connected(self, request):
+        request.connected = time.time()
+        if self.metrics is not None:
+            self.metrics.record_connect(request.switch,
+                                        request.connected - request.started)
+
+    @staticmethod
+    def _complete(request):
+        """
+        Returns True once the whole body announced by Content-length is
+            received, so the request does not depend on the switch closing
+            the connection cleanly
+        Called after every chunk received. The headers are parsed once
+            and the body is only counted, so a large response is not
+            copied again for every chunk
+        """
+        request.received += len(request.response[-1])
+        if request.header_length is None:
+            raw = "".join(request.response)
+            header, separator, _ = raw.partition("\r\n\r\n")
+            if not separator:
+                return False
+            request.header_length = len(header) + len(separator)
+            for line in header.split("\r\n")[1:]:
+                name, _, value = line.partition(":")
+                if name.strip().lower() == "content-length":
+                    request.content_length = int(value)
+        if request.content_length is None:
+            return False
+        return request.received - request.header_length >= \
+            request.content_length
+
+    def _decode(self, request):
+        """
+        Converts the raw HTTP response into the eAPI response dictionary
+        Raises ConnectionError or CommandError the same way pyeapi does
+        """
+        raw = "".join(request.response)
+        header, _, body = raw.partition("\r\n\r\n")
+        status_line = header.split("\r\n", 1)[0].split(None, 2)
+        if len(status_line) < 2:
+            raise pyeapi.eapilib.ConnectionError(
+                self.transport, "unable to connect to eAPI")
+        if status_line[1] == "401":
+            raise pyeapi.eapilib.ConnectionError(
+                self.transport, "%s. %s" % (" ".join(status_line[2:]), body))
+        try:
+            decoded = json.loads(body)
+        except ValueError:
+            raise pyeapi.eapilib.ConnectionError(
+                self.transport, "unable to connect to eAPI")
+
+        if "error" in decoded:
+            command_error = None
+            output = None
+            if "data" in decoded["error"]:
+                command_error = " ".join(
+                    decoded["error"]["data"][-1].get("errors", []))
+                output = decoded["error"]["data"]
+            raise pyeapi.eapilib.CommandError(
+                decoded["error"]["code"], decoded["error"]["message"],
+                command_error=command_error, output=output)
+
+        return decoded
+
+    def _record(self, request, size):
+        """
+        Records the round trip of the request from the end of its connect,
+            like MeteredNode, or from its start when it failed to connect
+        """
+        if self.metrics is not None:
+            start = request.connected or request.started
+            self.metrics.record_request(request.switch, request.commands,
+                                        time.time() - start, size)
+
+    def _finish(self, request, results):
+        self._record(request, sum(len(data) for data in request.response))
+        try:
+            results[request.switch] = self._decode(request)
+        except pyeapi.eapilib.EapiError as exc:
+            results[request.switch] = exc
+        self._close(request)
+
+    def _fail(self, request, results, message):
+        self._record(request, 0)
+        results[request.switch] = pyeapi.eapilib.ConnectionError(
+            self.transport, message, commands=request.commands)
+        self._close(request)
+
+    def _close(self, request):
+        if request.scheduled:
+            self.scheduler.release(request.switch)
+            request.scheduled = False
+        if request.sock is not None:
+            try:
+                request.sock.close()
+            except socket.error:
+                pass
+            request.sock = None
+
+    def _wait(self, in_flight, wait):
+        """
+        Waits until at least one socket is ready or the wait time expires
+        Returns the list of requests whose socket is ready
+        """
+        by_fd = dict((request.sock.fileno(), request) for request in in_flight)
+        if hasattr(select, "poll"):
+            poller = select.poll()
+            for fd, request in by_fd.items():
+                if request.wants_write():
+                    poller.register(fd, select.POLLOUT)
+                else:
+                    poller.register(fd, select.POLLIN)
+            return [by_fd[fd] for fd, _ in poller.poll(wait * 1000)]
+
+        readers = [fd for fd in by_fd if not by_fd[fd].wants_write()]
+        writers = [fd for fd in by_fd if by_fd[fd].wants_write()]
+        readable, writable, _ = select.select(readers, writers, [], wait)
+        return [by_fd[fd] for fd in readable + writable]
+
+    def execute_many(self, requests):
+        """
+        Runs the eAPI requests of many switches concurrently
+        requests is a dictionary of switch to the list of EOS commands
+        Returns a dictionary of switch to the eAPI response dictionary,
+            or to the ConnectionError/CommandError raised for that switch
+        """
+        results = {}
+        pending = []
+        for switch, commands in requests.items():
+            # The name lookup blocks, so it is done before any request
+            # is in flight
+            try:
+                self._resolve(switch)
+            except socket.error as exc:
+                self._fail(self._request(switch, commands), results,
+                           "Socket error during eAPI connection: %s"
+                           % str(exc))
+                continue
+            pending.append((switch, commands))
+        pending.reverse()
+        in_flight = []
+
+        while pending or in_flight:
+            waiting = []
+            retry = 1
+            while pending and len(in_flight) < self.max_in_flight:
+                switch, commands = pending.pop()
+                if self.scheduler is not None:
+                    delay = self.scheduler.try_acquire(switch, commands)
+                    if delay:
+                        waiting.append((switch, commands))
+                        retry = min(retry, delay)
+                        continue
+                request = self._request(switch, commands)
+                request.scheduled = self.scheduler is not None
+                try:
+                    self._start(request)
+                    in_flight.append(request)
+                except socket.error as exc:
+                    self._fail(request, results,
+                               "Socket error during eAPI connection: %s"
+                               % str(exc))
+
+            now = time.time()
+            for request in in_flight:
+                if now > request.deadline:
+                    self._fail(request, results, "timed out waiting for eAPI")
+            in_flight = [request for request in in_flight
+                         if request.sock is not None]
+            pending.extend(reversed(waiting))
+            if not in_flight:
+                if waiting:
+                    time.sleep(retry)
+                continue
+
+            wait = max(0, min(request.deadline for request in in_flight) - now)
+            for request in self._wait(in_flight, min(wait, retry)):
+                try:
+                    if self._step(request):
+                        self._finish(request, results)
+                except (socket.error, ssl.SSLError) as exc:
+                    self._fail(request, results,
+                               "Socket error during eAPI connection: %s"
+                               % str(exc))
+            in_flight = [request for request in in_flight
+                         if request.sock is not None]
+
+        return results
+
+
+class AsyncNode(object):
+
+    """
+        Connection to one switch through AsyncEapiClient with the same
+            execute([...]) contract as the pyeapi connection
+    """
+
+    def __init__(self, client, switch):
+        self.client = client
+        self.switch = switch
+
+    def execute(self, commands, encoding="json"):
+        response = self.client.execute_many({self.switch: commands})
+        response = response[self.switch]
+        if isinstance(response, Exception):
+            raise response
+        return response
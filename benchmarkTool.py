@@ -0,0 +1,164 @@
+# Copyright (c) 2016, Arista Networks, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+#   Neither the name of Arista Networks nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL ARISTA NETWORKS
+# BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+# BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
+# IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#
+# Author = Anees Mohammed
+#
+
+"""
+    End to end benchmark of AssessmentTool.py against eapiSimulator.py
+
+    For every fleet size, the simulator and the Assessment Tool run as
+    separate processes and the wall time, the peak RSS of the tool and
+    the eAPI requests it issued are reported.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib2
+
+
+TOOL_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def wait_for_simulator(port, simulator, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if simulator.poll() is not None:
+            raise RuntimeError("eapiSimulator.py exited during start up")
+        try:
+            return get_stats(port)
+        except IOError:
+            time.sleep(0.2)
+    raise RuntimeError("eapiSimulator.py did not start in %d seconds"
+                       % timeout)
+
+
+def get_stats(port):
+    response = urllib2.urlopen("http://127.0.0.1:%d/stats" % port)
+    return json.loads(response.read())
+
+
+def run_size(size, args):
+    """
+    Runs the Assessment Tool once against a simulated fleet of size
+        switches and returns the measurements
+    """
+    work_directory = tempfile.mkdtemp(prefix="assessment-benchmark-")
+    inventory = os.path.join(work_directory, "switches.txt")
+    simulator = subprocess.Popen(
+        [sys.executable, os.path.join(TOOL_DIRECTORY, "eapiSimulator.py"),
+         "--switches", str(size),
+         "--port", str(args.port),
+         "--spines", str(args.spines),
+         "--bgp-peers", str(args.bgp_peers),
+         "--latency", str(args.latency),
+         "--jitter", str(args.jitter),
+         "--failure-rate", str(args.failure_rate),
+         "--inventory", inventory],
+        stdout=open(os.devnull, "w"))
+    try:
+        wait_for_simulator(args.port, simulator)
+        requests_before = get_stats(args.port)["requests"]
+
+        environment = dict(os.environ,
+                           EAPI_USERNAME="admin", EAPI_PASSWORD="admin")
+        start = time.time()
+        tool = subprocess.Popen(
+            [sys.executable, os.path.join(TOOL_DIRECTORY, "AssessmentTool.py"),
+             "--eapi-transport", "http",
+             "--eapi-port", str(args.port),
+             "--eapi-client", args.eapi_client,
+             "--workers", str(args.workers)] + args.tool_args,
+            cwd=work_directory, env=environment,
+            stdout=open(os.devnull, "w"), stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(tool.pid, 0)
+        wall_time = time.time() - start
+
+        requests = get_stats(args.port)["requests"] - requests_before
+    finally:
+        simulator.terminate()
+        simulator.wait()
+        shutil.rmtree(work_directory)
+
+    # ru_maxrss is in kilobytes on Linux
+    return {"switches": size,
+            "wall_time": round(wall_time, 3),
+            "peak_rss_mb": round(usage.ru_maxrss / 1024.0, 1),
+            "requests": requests,
+            "exit_status": status}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark AssessmentTool.py against simulated fleets")
+    parser.add_argument("--sizes", default="10,100,1000,5000",
+                        help="comma separated fleet sizes "
+                             "(default: 10,100,1000,5000)")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--spines", type=int, default=4)
+    parser.add_argument("--bgp-peers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--eapi-client", choices=["pyeapi", "async"],
+                        default="pyeapi")
+    parser.add_argument("--json", metavar="FILE",
+                        help="also write the results to FILE as JSON")
+    parser.add_argument("tool_args", nargs=argparse.REMAINDER,
+                        help="extra AssessmentTool.py options, after --")
+    args = parser.parse_args()
+    args.tool_args = [arg for arg in args.tool_args if arg != "--"]
+
+    results = []
+    print "%10s %12s %14s %10s" % ("switches", "wall time s",
+                                   "peak RSS MB", "requests")
+    for size in [int(size) for size in args.sizes.split(",")]:
+        result = run_size(size, args)
+        results.append(result)
+        print "%10d %12.2f %14.1f %10d%s" % (
+            result["switches"], result["wall_time"], result["peak_rss_mb"],
+            result["requests"],
+            "" if result["exit_status"] == 0 else "  (tool failed)")
+
+    if args.json:
+        with open(args.json, "w") as writefile:
+            json.dump(results, writefile, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# Copyright (c) 2016, Arista Networks, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+#   Neither the name of Arista Networks nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL ARISTA NETWORKS
+# BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+# BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
+# IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#
+# Author = Anees Mohammed
+#
+
+
+"""
+    Fleet wide table of the BGP peers reported by show ip bgp summary
+
+    Every peer of every switch and VRF is one row, held column by column
+    in NumPy arrays, so that fleet wide questions are answered with
+    vectorized filters and aggregations instead of walking the nested
+    status of each switch. The table is saved to a compressed .npz file
+    and can be queried later with:
+
+    python bgpPeerTable.py bgp_peers.npz --state Active --count-by asn
+"""
+
+import argparse
+
+
+# Columns of the table, in the order of the rows
+COLUMNS = ("switch", "vrf", "peer", "state", "asn", "prefixes",
+           "up_down_time")
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("The BGP peer table needs the numpy module, "
+                           "install it with: pip install numpy")
+    return numpy
+
+
+class BgpPeerTable(object):
+
+    """
+        Columnar table of BGP peers, one NumPy array per column
+        switch, vrf, peer, state and asn are unicode arrays, prefixes is
+            an int64 array and up_down_time a float64 array of the epoch
+            time of the last state change of the peer
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    @classmethod
+    def from_peers(cls, peers):
+        """
+        Builds the table from a dictionary of switch to the peer rows
+            of BgpValidate.bgp_summary_peers
+        """
+        numpy = _numpy()
+        values = dict((column, []) for column in COLUMNS)
+        for switch in sorted(peers):
+            for row in peers[switch]:
+                values["switch"].append(switch)
+                for column, value in zip(COLUMNS[1:], row):
+                    values[column].append(value)
+
+        columns = {}
+        for column in COLUMNS[:5]:
+            columns[column] = numpy.array(values[column], dtype=unicode)
+        columns["prefixes"] = numpy.array(values["prefixes"],
+                                          dtype=numpy.int64)
+        columns["up_down_time"] = numpy.array(values["up_down_time"],
+                                              dtype=numpy.float64)
+        return cls(columns)
+
+    @classmethod
+    def load(cls, file_name):
+        numpy = _numpy()
+        with numpy.load(file_name) as saved:
+            return cls(dict((column, saved[column]) for column in COLUMNS))
+
+    def save(self, file_name):
+        """
+        Writes the columns to a compressed .npz file
+        """
+        with open(file_name, "wb") as writefile:
+            _numpy().savez_compressed(writefile, **self.columns)
+
+    def __len__(self):
+        return len(self.columns["switch"])
+
+    def mask(self, **criteria):
+        """
+        Returns the boolean array of the rows matching every criterion
+        A criterion is a column name and either a value or a list of
+            values, such as state="Active" or vrf=["default", "mgmt"]
+        """
+        numpy = _numpy()
+        selected = numpy.ones(len(self), dtype=bool)
+        for column in criteria:
+            values = criteria[column]
+            if isinstance(values, (list, tuple, set)):
+                selected &= numpy.in1d(self.columns[column], list(values))
+            else:
+                selected &= self.columns[column] == values
+        return selected
+
+    def not_established(self):
+        """
+        Returns the boolean array of the peers that are not Established
+        """
+        return self.columns["state"] != u"Established"
+
+    def select(self, mask):
+        """
+        Returns a new table with the rows of the boolean array
+        """
+        return BgpPeerTable(dict((column, self.columns[column][mask])
+                                 for column in COLUMNS))
+
+    def count_by(self, column, mask=None):
+        """
+        Returns the (value, number of rows) pairs of a column, most
+            frequent first, over the rows of the boolean array if given
+        """
+        numpy = _numpy()
+        values = self.columns[column]
+        if mask is not None:
+            values = values[mask]
+        unique, counts = numpy.unique(values, return_counts=True)
+        order = numpy.argsort(-counts, kind="mergesort")
+        return [(unique[index], int(counts[index])) for index in order]
+
+    def sum_by(self, column, value_column, mask=None):
+        """
+        Returns the (value, sum of value_column) pairs of a column,
+            largest first, such as the prefixes received per switch
+        """
+        numpy = _numpy()
+        keys = self.columns[column]
+        values = self.columns[value_column]
+        if mask is not None:
+            keys = keys[mask]
+            values = values[mask]
+        unique, inverse = numpy.unique(keys, return_inverse=True)
+        sums = numpy.bincount(inverse, weights=values,
+                              minlength=len(unique))
+        order = numpy.argsort(-sums, kind="mergesort")
+        return [(unique[index], sums[index]) for index in order]
+
+    def rows(self, mask=None):
+        """
+        Yields the rows of the table, or of the boolean array, as tuples
+            in the order of COLUMNS
+        """
+        table = self if mask is None else self.select(mask)
+        for position in range(len(table)):
+            yield tuple(table.columns[column][position].item()
+                        for column in COLUMNS)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Query a BGP peer table saved by the Assessment Tool")
+    parser.add_argument("table", help="the .npz file of --bgp-table")
+    for column in COLUMNS[:5]:
+        parser.add_argument("--" + column.replace("_", "-"),
+                            action="append",
+                            help="keep the rows with this %s, can be given "
+                                 "more than once" % column)
+    parser.add_argument("--not-established", action="store_true",
+                        help="keep the peers that are not Established")
+    parser.add_argument("--count-by", choices=COLUMNS[:5],
+                        help="print the number of peers per value of the "
+                             "column instead of the peers")
+    args = parser.parse_args()
+
+    table = BgpPeerTable.load(args.table)
+    criteria = dict((column, getattr(args, column))
+                    for column in COLUMNS[:5] if getattr(args, column))
+    mask = table.mask(**criteria)
+    if args.not_established:
+        mask &= table.not_established()
+
+    if args.count_by:
+        for value, count in table.count_by(args.count_by, mask):
+            print "%s\t%d" % (value, count)
+        return
+
+    print "\t".join(COLUMNS)
+    for row in table.rows(mask):
+        print "\t".join(unicode(value) for value in row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# Copyright (c) 2016, Arista Networks, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+#   Neither the name of Arista Networks nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL ARISTA NETWORKS
+# BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+# BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
+# IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#
+# Author = Anees Mohammed
+#
+
+import csv
+
+from linkTable import LinkTable
+
+
+def parse_speed(speed):
+    """
+    Returns the speed of a cabling plan line in Gbps, or None when no
+        speed is given
+    "100", "100G" and "100g" are all 100, "2.5G" is 2.5
+    Raises ValueError for any other text
+    """
+    speed = speed.strip().rstrip("Gg")
+    if not speed:
+        return None
+    speed = float(speed)
+    if speed <= 0:
+        raise ValueError(speed)
+    return int(speed) if speed == int(speed) else speed
+
+
+class CablingPlan(object):
+
+    """
+        Intended cabling of the network, read from a CSV file with one
+            line per link: device, port, peer device, peer port and the
+            expected speed in Gbps (optional)
+        Every planned link is indexed by its canonical LinkTable key, and
+            every planned port by (device, port), so each link found by
+            LLDP is checked with a few dictionary lookups
+    """
+
+    def __init__(self):
+        self.links = {}
+        self.ports = {}
+
+    @classmethod
+    def load(cls, file_name):
+        """
+        Returns the plan read from file_name
+        Raises ValueError, with the file name and line number, for a line
+            without the four ports fields or with a speed that is not a
+            number of Gbps
+        """
+        plan = cls()
+        with open(file_name) as readfile:
+            reader = csv.reader(readfile)
+            for row in reader:
+                if not row or not row[0].strip() or \
+                        row[0].strip().startswith("#"):
+                    continue
+                if row[0].strip().lower() == "device":
+                    # Header line
+                    continue
+                if len(row) < 4 or not all(value.strip()
+                                           for value in row[:4]):
+                    raise ValueError(
+                        "%s:%d: expected device,port,peer device,peer "
+                        "port[,speed] in %s"
+                        % (file_name, reader.line_num, ",".join(row)))
+                device, port, peer_device, peer_port = \
+                    [value.strip() for value in row[:4]]
+                try:
+                    speed = parse_speed(row[4]) if len(row) > 4 else None
+                except ValueError:
+                    raise ValueError("%s:%d: %s is not a speed in Gbps"
+                                     % (file_name, reader.line_num,
+                                        row[4].strip()))
+                plan.add(device, port, peer_device, peer_port, speed)
+        return plan
+
+    def add(self, device, port, peer_device, peer_port, speed=None):
+        key = LinkTable.link_key(device, port, peer_device, peer_port)
+        self.links[key] = speed
+        self.ports[(device, port)] = key
+        self.ports[(peer_device, peer_port)] = key
+
+    @staticmethod
+    def _describe(key):
+        return "%s %s - %s %s" % key
+
+    def compare(self, links):
+        """
+        Compares the links of a LinkTable with the plan in one pass
+        Returns the list of (section, issues) for the report:
+            Missing Links: planned links not seen by LLDP
+            Unexpected Links: links seen by LLDP between ports that are
+                not in the plan
+            Miswired Ports: links seen by LLDP on a planned port, but to
+                another peer port than the planned one
+            Speed Mismatches: planned links running at another speed
+        """
+        missing = dict(self.links)
+        unexpected = []
+        miswired = []
+        speed_mismatches = []
+
+        for device, port, neighbor, neighbor_port, speed in links:
+            key = LinkTable.link_key(device, port, neighbor, neighbor_port)
+            if key in self.links:
+                del missing[key]
+                expected = self.links[key]
+                # The topology holds the speeds in whole Gbps, like
+                # Commands.getspeed returns them
+                if expected is not None and speed is not None and \
+                        int(expected) != speed:
+                    speed_mismatches.append(
+                        "%s: planned %sG, running at %sG"
+                        % (self._describe(key), expected, speed))
+                continue
+
+            planned = [self.ports[end] for end in
+                       ((device, port), (neighbor, neighbor_port))
+                       if end in self.ports]
+            if not planned:
+                unexpected.append(self._describe(key))
+                continue
+            for planned_key in planned:
+                # The planned link of a miswired port is reported here,
+                # not again as a missing link
+                missing.pop(planned_key, None)
+            miswired.append("%s: planned %s" % (
+                self._describe(key),
+                " and ".join(self._describe(planned_key)
+                             for planned_key in sorted(set(planned)))))
+
+        return [("Missing Links",
+                 sorted(self._describe(key) for key in missing)),
+                ("Unexpected Links", sorted(unexpected)),
+                ("Miswired Ports", sorted(miswired)),
+                ("Speed Mismatches", sorted(speed_mismatches))]
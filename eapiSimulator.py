@@ -0,0 +1,356 @@
+# Copyright (c) 2016, Arista Networks, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+#   Neither the name of Arista Networks nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL ARISTA NETWORKS
+# BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+# BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
+# IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#
+# Author = Anees Mohammed
+#
+
+"""
+    Local eAPI stand-in that emulates a fleet of Arista switches
+
+    Switch number N answers on the loopback address 127.0.0.1 + N, on the
+    port given with --port, over plain http. Run the Assessment Tool with
+    --eapi-transport http --eapi-port <port> against the addresses printed
+    by --inventory.
+"""
+
+import BaseHTTPServer
+import SocketServer
+import argparse
+import json
+import random
+import socket
+import struct
+import threading
+import time
+
+
+FIRST_ADDRESS = struct.unpack("!I", socket.inet_aton("127.0.0.1"))[0]
+
+
+def switch_address(index):
+    return socket.inet_ntoa(struct.pack("!I", FIRST_ADDRESS + index))
+
+
+def switch_index(address):
+    return struct.unpack("!I", socket.inet_aton(address))[0] - FIRST_ADDRESS
+
+
+class FleetModel(object):
+
+    """
+        Leaf/spine fabric used by the simulator
+        The first spines switches are spines, the others are leaves.
+        Every leaf has one link to every spine, consecutive leaves form
+            MLAG pairs, and every switch has bgp_peers configured BGP
+            neighbors of which bgp_down_rate are not Established
+        errdisabled_rate of the switches have an errdisabled interface
+            next to their links
+    """
+
+    def __init__(self, switches, spines=2, bgp_peers=4, bgp_down_rate=0.0,
+                 mlag=True, seed=0, errdisabled_rate=0.0):
+        self.switches = switches
+        self.spines = min(spines, switches)
+        self.bgp_peers = bgp_peers
+        self.bgp_down_rate = bgp_down_rate
+        self.mlag = mlag
+        self.seed = seed
+        self.errdisabled_rate = errdisabled_rate
+
+    def hostname(self, index):
+        if index < self.spines:
+            return "spine%d" % (index + 1)
+        return "leaf%d" % (index - self.spines + 1)
+
+    def links(self, index):
+        """
+        Returns the (local port, neighbor index, neighbor port) links
+        """
+        if index < self.spines:
+            return [("Ethernet%d" % (leaf - self.spines + 1), leaf,
+                     "Ethernet%d" % (index + 1))
+                    for leaf in range(self.spines, self.switches)]
+        return [("Ethernet%d" % (spine + 1), spine,
+                 "Ethernet%d" % (index - self.spines + 1))
+                for spine in range(self.spines)]
+
+    def bgp_neighbors(self, index):
+        return ["10.%d.%d.%d" % (index >> 8 & 255, index & 255, peer + 1)
+                for peer in range(self.bgp_peers)]
+
+    def mlag_peer(self, index):
+        if not self.mlag or index < self.spines:
+            return None
+        peer = index + 1 if (index - self.spines) % 2 == 0 else index - 1
+        if peer >= self.switches:
+            return None
+        return peer
+
+    def respond(self, index, command):
+        """
+        Returns the JSON result of one EOS command, shaped like EOS output
+        Raises KeyError for commands the simulator does not know
+        """
+        hostname = self.hostname(index)
+        if command == "enable":
+            return {}
+
+        if command == "show hostname":
+            return {"hostname": hostname, "fqdn": hostname}
+
+        if command == "show lldp neighbors":
+            return {"lldpNeighbors": [
+                {"port": port,
+                 "neighborDevice": self.hostname(neighbor),
+                 "neighborPort": neighbor_port,
+                 "ttl": 120}
+                for port, neighbor, neighbor_port in self.links(index)]}
+
+        if command == "show lldp neighbors detail":
+            neighbors = {}
+            for port, neighbor, neighbor_port in self.links(index):
+                neighbors[port] = {"lldpNeighborInfo": [{
+                    "systemName": self.hostname(neighbor),
+                    "chassisId": "0000.0000.%04x" % neighbor,
+                    "neighborInterfaceInfo": {
+                        "interfaceId": '"%s"' % neighbor_port},
+                    "managementAddresses": [{
+                        "addressType": "ipv4",
+                        "address": switch_address(neighbor)}]}]}
+            return {"lldpNeighbors": neighbors}
+
+        if command == "show interfaces status":
+            statuses = {}
+            for port, _, _ in self.links(index):
+                statuses[port] = {"bandwidth": 100000000000,
+                                  "linkStatus": "connected",
+                                  "interfaceType": "100GBASE-SR4"}
+            if random.Random(self.seed - index - 1).random() < \
+                    self.errdisabled_rate:
+                port = "Ethernet%d" % (len(statuses) + 1)
+                statuses[port] = {"bandwidth": 100000000000,
+                                  "linkStatus": "errdisabled",
+                                  "interfaceType": "100GBASE-SR4"}
+            return {"interfaceStatuses": statuses}
+
+        if command in ("show running-config",
+                       "show running-config section router bgp"):
+            router_bgp = {}
+            for neighbor in self.bgp_neighbors(index):
+                router_bgp["neighbor %s remote-as 65000" % neighbor] = None
+            router_bgp["network 10.%d.%d.0/24" % (index >> 8 & 255,
+                                                   index & 255)] = None
+            config = {"router bgp %d" % (65000 + index):
+                          {"cmds": router_bgp}}
+            if command == "show running-config":
+                config["hostname %s" % hostname] = None
+            return {"cmds": config}
+
+        if command == "show ip bgp summary vrf all":
+            states = random.Random(self.seed + index)
+            peers = {}
+            for neighbor in self.bgp_neighbors(index):
+                state = "Established"
+                if states.random() < self.bgp_down_rate:
+                    state = "Active"
+                peers[neighbor] = {"peerState": state,
+                                   "asn": 65000,
+                                   "prefixReceived": 10,
+                                   "upDownTime": 1476000000.0}
+            return {"vrfs": {"default": {"peers": peers,
+                                         "asn": 65000 + index,
+                                         "routerId": switch_address(index)}}}
+
+        if command == "show ipv6 bgp summary vrf all":
+            return {"vrfs": {}}
+
+        if command == "show mlag":
+            if self.mlag_peer(index) is None:
+                return {"state": "disabled"}
+            return {"domainId": "mlag%d" % (min(index,
+                                                self.mlag_peer(index))),
+                    "localInterface": "Vlan4094",
+                    "peerLink": "Port-Channel2000",
+                    "state": "active",
+                    "mlagPorts": {"Active-full": 4,
+                                  "Inactive": 0,
+                                  "Active-partial": 0,
+                                  "Disabled": 0,
+                                  "Configured": 4}}
+
+        raise KeyError(command)
+
+
+class EapiHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    """
+        Answers the eAPI JSON-RPC requests of one simulated switch, chosen
+            by the local address the request arrived on
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path != "/stats":
+            self.send_error(404)
+            return
+        self._send(200, self.server.get_stats())
+
+    def do_POST(self):
+        index = switch_index(self.connection.getsockname()[0])
+        request = json.loads(self.rfile.read(
+            int(self.headers["Content-length"])))
+        commands = request["params"]["cmds"]
+        self.server.count(len(commands))
+
+        if not 0 <= index < self.server.fleet.switches:
+            self.send_error(404)
+            return
+
+        time.sleep(self.server.latency +
+                   random.uniform(0, self.server.jitter))
+
+        if random.random() < self.server.failure_rate:
+            # Reset the connection like an unreachable eAPI agent
+            self.close_connection = 1
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER,
+                                       struct.pack("ii", 1, 0))
+            self.connection.close()
+            return
+
+        results = []
+        for position, command in enumerate(commands):
+            try:
+                results.append(self.server.fleet.respond(index, command))
+            except KeyError:
+                message = "CLI command %d of %d '%s' failed: invalid " \
+                          "command" % (position + 1, len(commands), command)
+                self._send(200, {"jsonrpc": "2.0",
+                                 "id": request.get("id"),
+                                 "error": {"code": 1002,
+                                           "message": message,
+                                           "data": results + [{
+                                               "errors": ["Invalid input"]}]}})
+                return
+
+        self._send(200, {"jsonrpc": "2.0",
+                         "id": request.get("id"),
+                         "result": results})
+
+    def _send(self, status, body):
+        data = json.dumps(body)
+        self.send_response(status)
+        self.send_header("Content-type", "application/json")
+        self.send_header("Content-length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FleetSimulator(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    """
+        Threaded http server answering for every switch of a FleetModel
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, fleet, port, latency=0.0, jitter=0.0,
+                 failure_rate=0.0):
+        BaseHTTPServer.HTTPServer.__init__(self, ("", port), EapiHandler)
+        self.fleet = fleet
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.commands = 0
+
+    def verify_request(self, request, client_address):
+        # Only answer on the loopback addresses
+        return request.getsockname()[0].startswith("127.")
+
+    def count(self, commands):
+        with self.lock:
+            self.requests += 1
+            self.commands += commands
+
+    def get_stats(self):
+        with self.lock:
+            return {"requests": self.requests, "commands": self.commands}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local eAPI stand-in emulating a fleet of switches")
+    parser.add_argument("--switches", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--spines", type=int, default=2)
+    parser.add_argument("--bgp-peers", type=int, default=4)
+    parser.add_argument("--bgp-down-rate", type=float, default=0.0,
+                        help="fraction of BGP peers not Established")
+    parser.add_argument("--errdisabled-rate", type=float, default=0.0,
+                        help="fraction of switches with an errdisabled "
+                             "interface")
+    parser.add_argument("--no-mlag", action="store_true",
+                        help="do not configure MLAG pairs on the leaves")
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="random seconds added on top of the latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="fraction of requests dropped without answer")
+    parser.add_argument("--inventory", metavar="FILE",
+                        help="write the switch addresses to FILE "
+                             "(switches.txt format) and keep serving")
+    args = parser.parse_args()
+
+    fleet = FleetModel(args.switches, args.spines, args.bgp_peers,
+                       args.bgp_down_rate, not args.no_mlag,
+                       errdisabled_rate=args.errdisabled_rate)
+
+    if args.inventory:
+        with open(args.inventory, "w") as writefile:
+            for index in range(args.switches):
+                writefile.write(switch_address(index) + "\n")
+
+    server = FleetSimulator(fleet, args.port, args.latency, args.jitter,
+                            args.failure_rate)
+    print "Simulating %d switches on port %d" % (args.switches, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Copyright (c) 2016, Arista Networks, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+#   Neither the name of Arista Networks nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL ARISTA NETWORKS
+# BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+# BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
+# IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#
+# Author = Anees Mohammed
+#
+
+
+"""
+    Example check loaded with --check-module, see Adding a check in the
+    README:
+
+    python AssessmentTool.py --check-module interfaceCheck
+"""
+
+from networkAssessmentComponents import Check, register_check
+
+
+@register_check
+class InterfaceValidate(Check):
+
+    """
+        Reports the errdisabled interfaces of every switch
+        Reads show interfaces status, which the topology check reads as
+            well, so it costs no eAPI request of its own when both run
+    """
+
+    required_commands = ["show interfaces status"]
+    report_phase = "interfaces"
+    report_title = "Interface Validation"
+    error_title = "Interface Validation Related EOS Commands Error"
+
+    def check_switch(self, eos_commands):
+        interfaces = eos_commands.interfaces()
+        status = {}
+        for interface in interfaces:
+            if interfaces[interface].get("linkStatus") == "errdisabled":
+                status[str(interface)] = "Interface is errdisabled"
+        return status
@@ -0,0 +1,119 @@
+# Copyright (c) 2016, Arista Networks, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+#   Neither the name of Arista Networks nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL ARISTA NETWORKS
+# BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+# BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
+# IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#
+# Author = Anees Mohammed
+#
+
+import time
+
+from runState import load_switches, save_switches
+
+
+class InventoryCache(object):
+
+    """
+        Per switch address knowledge kept from one run to the next in a
+            JSON file: the hostname, the time of the last run that reached
+            the switch, and the last failures of the switch
+        A hostname is trusted for expiry seconds after the last success,
+            so that runs within that time do not ask the switches for it
+    """
+
+    def __init__(self, switches=None, expiry=86400, history=10):
+        self.switches = switches if switches is not None else {}
+        self.expiry = expiry
+        self.history = history
+
+    @classmethod
+    def load(cls, file_name, expiry=86400):
+        """
+        Returns the cache saved in file_name, or an empty cache if the
+            file does not exist
+        """
+        return cls(load_switches(file_name), expiry)
+
+    def save(self, file_name):
+        save_switches(file_name, self.switches)
+
+    def _entry(self, switch):
+        return self.switches.setdefault(
+            switch, {"hostname": None, "last_success": None, "failures": []})
+
+    def record_success(self, switch, hostname, now=None):
+        entry = self._entry(switch)
+        entry["hostname"] = hostname
+        entry["last_success"] = now if now is not None else time.time()
+
+    def record_failure(self, switch, error, now=None):
+        """
+        Adds a failure to the history of the switch, which keeps the last
+            self.history failures
+        """
+        entry = self._entry(switch)
+        entry["failures"].append([now if now is not None else time.time(),
+                                  error])
+        del entry["failures"][:-self.history]
+
+    def hostnames(self, switches, now=None):
+        """
+        Returns the hostnames of the switches that were reached less than
+            expiry seconds ago and have not failed since
+        """
+        now = now if now is not None else time.time()
+        hostnames = {}
+        for switch in switches:
+            entry = self.switches.get(switch)
+            if entry is None or entry["last_success"] is None or \
+                    self.recent_failures(switch):
+                continue
+            if now - entry["last_success"] < self.expiry:
+                hostnames[switch] = entry["hostname"]
+        return hostnames
+
+    def recent_failures(self, switch):
+        """
+        Returns the number of failures of the switch since it was last
+            reached
+        """
+        entry = self.switches.get(switch)
+        if entry is None:
+            return 0
+        last_success = entry["last_success"] or 0
+        return len([failure for failure in entry["failures"]
+                    if failure[0] > last_success])
+
+    def order(self, switches):
+        """
+        Returns the switches with the ones failing since they were last
+            reached at the end, so that they do not hold the workers
+            before the healthy switches are done
+        """
+        return sorted(switches, key=self.recent_failures)
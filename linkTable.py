@@ -0,0 +1,87 @@
+# Copyright (c) 2016, Arista Networks, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+#   Neither the name of Arista Networks nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL ARISTA NETWORKS
+# BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+# BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
+# IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#
+# Author = Anees Mohammed
+#
+
+class LinkTable(object):
+
+    """
+        Set of the physical links of the network, built from the LLDP
+            neighbors of every switch
+        Both switches of a link report it, each from its own side. The
+            link is indexed by a canonical key, the two (device, port)
+            ends in sorted order, so both halves map to the same entry
+            whatever side is seen first
+        A link is stored once, as its key and its speed, with the device
+            and port names shared between all the links using them
+    """
+
+    def __init__(self):
+        self.links = {}
+        self.names = {}
+
+    def _name(self, name):
+        return self.names.setdefault(name, name)
+
+    @staticmethod
+    def link_key(device, port, neighbor, neighbor_port):
+        """
+        Returns the order independent key of the link between
+            device/port and neighbor/neighbor_port
+        """
+        if (device, port) <= (neighbor, neighbor_port):
+            return device, port, neighbor, neighbor_port
+        return neighbor, neighbor_port, device, port
+
+    def add(self, device, port, neighbor, neighbor_port, speed=None):
+        """
+        Adds the link seen by device on port, if it is not known yet
+        Returns True if the link is new
+        """
+        key = self.link_key(self._name(device), self._name(port),
+                            self._name(neighbor), self._name(neighbor_port))
+        if key in self.links:
+            if self.links[key] is None and speed is not None:
+                self.links[key] = speed
+            return False
+        self.links[key] = speed
+        return True
+
+    def __len__(self):
+        return len(self.links)
+
+    def __iter__(self):
+        """
+        Yields (device, port, neighbor, neighbor port, speed) for every link
+        """
+        for key, speed in self.links.iteritems():
+            yield key + (speed,)
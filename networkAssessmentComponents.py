@@ -32,9 +32,22 @@
 # Author = Anees Mohammed
 #
 
-import networkx as nx
+import hashlib
+import Queue
+import json
 import pyeapi
 import re
+import sys
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+from asyncEapi import AsyncEapiClient
+from linkTable import LinkTable
+from topologyExport import EXPORTERS
+from runMetrics import MeteredNode
+from snapshotStore import RecordingNode
+from requestScheduler import ScheduledNode
+from switchHealth import RetryingNode, backoff_delay
 
 
 class Commands(object):
@@ -43,12 +56,14 @@ class Commands(object):
         Commands Library used by all the Use Cases (BGP & MLAG)
     """
 
-    def __init__(self, switch, username, password):
-        self.node = pyeapi.connect(transport="https",
-                                   host=switch,
-                                   username=username,
-                                   password=password,
-                                   port=None)
+    def __init__(self, switch, username, password, node=None):
+        if node is None:
+            node = pyeapi.connect(transport="https",
+                                  host=switch,
+                                  username=username,
+                                  password=password)
+        self.node = node
+        self.interface_index = None
 
     def getlldpinfo(self):
         eos_command = "show lldp neighbors"
@@ -56,11 +71,43 @@ class Commands(object):
         neighbors = response["result"][0]["lldpNeighbors"]
         return neighbors
 
-    def getspeed(self, interface_name):
-        eos_command = "show interfaces status"
+    def getlldpdetail(self):
+        """
+        Returns the LLDP neighbors of the switch as a list of
+            (neighbor name, management address) tuples
+        The management address is None when the neighbor does not
+            advertise an IPv4 or IPv6 one
+        """
+        eos_command = "show lldp neighbors detail"
         response = self.node.execute([eos_command])
-        speed = (response["result"][0]["interfaceStatuses"]
-                         [interface_name]["bandwidth"])
+        neighbors = []
+        for port_info in response["result"][0]["lldpNeighbors"].values():
+            for neighbor in port_info.get("lldpNeighborInfo", []):
+                addresses = [address["address"] for address in
+                             neighbor.get("managementAddresses", [])
+                             if address.get("addressType") == "ipv4"]
+                addresses += [address["address"] for address in
+                              neighbor.get("managementAddresses", [])
+                              if address.get("addressType") == "ipv6"]
+                neighbors.append((str(neighbor.get("systemName", "")),
+                                  str(addresses[0]) if addresses else None))
+        return neighbors
+
+    def interfaces(self):
+        """
+        Returns the interface index of the switch, keyed by interface name
+        show interfaces status is executed only once per Commands object,
+            every later lookup is answered from the index
+        """
+        if self.interface_index is None:
+            eos_command = "show interfaces status"
+            response = self.node.execute([eos_command])
+            self.interface_index = (response["result"][0]
+                                    ["interfaceStatuses"])
+        return self.interface_index
+
+    def getspeed(self, interface_name):
+        speed = self.interfaces()[interface_name]["bandwidth"]
         return (speed/1000000000)
 
     def hostname(self):
@@ -69,18 +116,43 @@ class Commands(object):
         host_name = str(response["result"][0]["fqdn"])
         return host_name
 
+    def hostnames(self):
+        """
+        Returns the set of names of the switch, its hostname and FQDN
+        """
+        eos_command = "show hostname"
+        response = self.node.execute([eos_command])
+        return set([str(response["result"][0]["hostname"]),
+                    str(response["result"][0]["fqdn"])])
+
     def runningconfig(self):
         eos_command = ["enable", "show running-config"]
         response = self.node.execute(eos_command)
         running_config = response["result"][1]["cmds"]
         return running_config
 
+    def bgpconfig(self):
+        """
+        Returns only the router bgp section of the running-config, which
+            is a small fraction of the full configuration on large devices
+        """
+        eos_command = ["enable", "show running-config section router bgp"]
+        response = self.node.execute(eos_command)
+        bgp_config = response["result"][1]["cmds"]
+        return bgp_config
+
     def bgpsummary(self):
         eos_command = "show ip bgp summary vrf all"
         response = self.node.execute([eos_command])
         bgp_summary = response["result"][0]["vrfs"]
         return bgp_summary
 
+    def ipv6bgpsummary(self):
+        eos_command = "show ipv6 bgp summary vrf all"
+        response = self.node.execute([eos_command])
+        bgp_summary = response["result"][0]["vrfs"]
+        return bgp_summary
+
     def mlag(self):
         eos_command = "show mlag"
         response = self.node.execute([eos_command])
@@ -88,21 +160,754 @@ class Commands(object):
         return sh_mlag
 
 
+class CachedNode(object):
+
+    """
+        Answers execute() calls from eAPI responses collected in advance
+        Used in place of the pyeapi connection by the Commands class
+    """
+
+    def __init__(self):
+        self.results = {}
+
+    def store(self, commands, response):
+        """
+        Saves the eAPI response of a list of commands
+        response is either the eAPI response dictionary or the
+            ConnectionError/CommandError raised while collecting it
+        """
+        for position, command in enumerate(commands):
+            if isinstance(response, Exception):
+                self.results[command] = response
+            else:
+                self.results[command] = response["result"][position]
+
+    def execute(self, commands, encoding="json"):
+        result = []
+        for command in commands:
+            if command not in self.results:
+                raise pyeapi.eapilib.CommandError(
+                    1002, "%s was not collected from this switch" % command)
+            if isinstance(self.results[command], Exception):
+                raise self.results[command]
+            result.append(self.results[command])
+
+        return {"result": result}
+
+
 class DefineEapiVariables(object):
 
     """
         Parent Class for all the Use Cases (BGP & MLAG)
     """
-    def __init__(self, devices, username, password):
+    # EOS commands needed by the use case, collected in advance by the
+    # Collector or when the async eAPI client is used
+    required_commands = []
+
+    # Name of the use case in the report
+    report_phase = None
+
+    def __init__(self, devices, username, password, workers=1,
+                 eapi_client="pyeapi", nodes=None, snapshot=None,
+                 transport="https", port=None, report=None, metrics=None,
+                 timeout=60, retries=0, backoff=0.5, breaker=None,
+                 scheduler=None):
         self.devices = devices
         self.username = username
         self.password = password
+        self.workers = workers
+        self.eapi_client = eapi_client
+        self.nodes = nodes if nodes is not None else {}
+        self.snapshot = snapshot
+        self.transport = transport
+        self.port = port
+        self.report = report
+        self.metrics = metrics
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker
+        self.scheduler = scheduler
         self.hostnames = {}
         self.errors = {}
 
+    def commands(self, switch):
+        """
+        Returns the Commands object used to talk to the switch
+        """
+        node = self.nodes.get(switch)
+        if node is None:
+            node = self.connect(switch)
+        return Commands(switch, self.username, self.password, node)
+
+    def connect(self, switch):
+        """
+        Returns the eAPI connection to the switch
+        Every request gives up after self.timeout seconds without an
+            answer and is retried self.retries times on connection
+            errors. Each attempt waits for the scheduler when there is
+            one, is timed when metrics are enabled, and the final
+            response is saved when a snapshot is recorded
+        """
+        def open_connection():
+            node = pyeapi.connect(transport=self.transport,
+                                  host=switch,
+                                  username=self.username,
+                                  password=self.password,
+                                  port=self.port,
+                                  timeout=self.timeout)
+            if self.metrics is not None:
+                # Time every request sent to the switch
+                node = MeteredNode(node, self.metrics, switch)
+            if self.scheduler is not None:
+                # Respect the rate and concurrency limits of the run
+                node = ScheduledNode(node, self.scheduler, switch)
+            return node
+
+        node = RetryingNode(open_connection, switch, self.retries,
+                            self.backoff, self.breaker)
+        if self.snapshot is not None:
+            # Save every raw response collected from the switch
+            node = RecordingNode(node, self.snapshot, switch)
+        return node
+
+    def async_client(self):
+        """
+        Returns the async eAPI client used to collect from all the switches
+        """
+        return AsyncEapiClient(self.username, self.password,
+                               transport=self.transport, port=self.port,
+                               timeout=self.timeout,
+                               max_in_flight=self.workers,
+                               metrics=self.metrics,
+                               scheduler=self.scheduler)
+
+    def prefetch(self):
+        """
+        Collects the required_commands of all the switches in one pass
+            of the async eAPI client, keeping up to self.workers requests
+            in flight from a single thread
+        The per switch work then runs from the collected responses
+        """
+        self.collect_nodes(self.required_commands)
+
+    @staticmethod
+    def _single_commands(commands):
+        """
+        Splits a batch into one request per command, keeping the
+            enable command in front of each of them when needed
+        """
+        prefix = [command for command in commands if command == "enable"]
+        return [prefix + [command] for command in commands
+                if command != "enable"]
+
+    def _collect_switch(self, switch, commands):
+        """
+        Sends all the commands to the switch in a single batched request
+        If one of the commands fails, the commands are sent one by one,
+            so that a single unsupported command only fails itself
+        Called by collect_nodes method
+        """
+        node = CachedNode()
+        try:
+            connection = self.connect(switch)
+            try:
+                node.store(commands, connection.execute(commands))
+            except pyeapi.eapilib.CommandError:
+                for single in self._single_commands(commands):
+                    try:
+                        node.store(single, connection.execute(single))
+                    except pyeapi.eapilib.CommandError as exc:
+                        node.store(single[-1:], exc)
+
+        except pyeapi.eapilib.ConnectionError as exc:
+            node.store(commands, exc)
+
+        return node
+
+    def collect_nodes(self, commands):
+        """
+        Collects the commands from every switch with one eAPI session and
+            one batched request per switch
+        Saves the responses in the nodes dictionary, which Commands then
+            uses instead of connecting to the switch again
+        """
+        if self.eapi_client != "async":
+            self.nodes.update(self.run_on_switches(
+                lambda switch: self._collect_switch(switch, commands)))
+            return
+
+        self.nodes.update(self._collect_async(self.devices, commands))
+
+    def _collect_async(self, switches, commands):
+        """
+        Collects the commands from the switches with the async eAPI
+            client, retrying one command at a time on the switches where
+            the batch failed with a CommandError
+        Returns a dictionary of switch to CachedNode
+        Called by collect_nodes method and by the Pipeline
+        """
+        nodes = {}
+        client = self.async_client()
+        responses = self._execute_many(
+            client, dict((switch, commands) for switch in switches))
+        failed = []
+        for switch, response in responses.items():
+            if self.snapshot is not None:
+                self.snapshot.save(switch, commands, response)
+            nodes[switch] = CachedNode()
+            if isinstance(response, pyeapi.eapilib.CommandError):
+                failed.append(switch)
+            else:
+                nodes[switch].store(commands, response)
+
+        for single in self._single_commands(commands):
+            responses = self._execute_many(
+                client, dict((switch, single) for switch in failed))
+            for switch, response in responses.items():
+                if self.snapshot is not None:
+                    self.snapshot.save(switch, single, response)
+                if isinstance(response, pyeapi.eapilib.CommandError):
+                    nodes[switch].store(single[-1:], response)
+                else:
+                    nodes[switch].store(single, response)
+
+        return nodes
+
+    def _execute_many(self, client, requests):
+        """
+        Sends the requests of the async client and sends again, up to
+            self.retries times, the ones that failed with a
+            ConnectionError after a jittered exponential backoff
+        Switches marked unhealthy by the circuit breaker are not sent
+        Called by collect_nodes method
+        """
+        responses = {}
+        attempt = 0
+        while True:
+            pending = {}
+            for switch in requests:
+                if self.breaker is None or self.breaker.allow(switch):
+                    pending[switch] = requests[switch]
+                elif switch not in responses:
+                    responses[switch] = pyeapi.eapilib.ConnectionError(
+                        switch, "eAPI of the switch failed too many times")
+            responses.update(client.execute_many(pending))
+
+            failed = {}
+            for switch in pending:
+                if isinstance(responses[switch],
+                              pyeapi.eapilib.ConnectionError):
+                    failed[switch] = pending[switch]
+                    if self.breaker is not None:
+                        self.breaker.record_failure(switch)
+                elif self.breaker is not None:
+                    self.breaker.record_success(switch)
+
+            if not failed or attempt >= self.retries:
+                return responses
+            time.sleep(backoff_delay(attempt, self.backoff))
+            attempt += 1
+            requests = failed
+
+    def _run_one(self, per_switch, switch):
+        """
+        Runs the per switch work and converts the eAPI exceptions into
+            the error messages used in the errors dictionary
+        Records the time spent on the switch when metrics are enabled.
+            When the responses were collected in advance, this is the
+            time spent parsing them
+        Switches marked unhealthy by the circuit breaker are skipped
+        Called by run_on_switches method
+        """
+        if self.breaker is not None and not self.breaker.allow(switch):
+            return switch, None, ("ConnectionError: switch skipped after "
+                                  "repeated eAPI failures")
+
+        start = time.time()
+        try:
+            result = per_switch(switch)
+            if self.metrics is not None and self.report_phase is not None:
+                self.metrics.record_parse(self.report_phase, switch,
+                                          time.time() - start)
+            return switch, result, None
+
+        except pyeapi.eapilib.ConnectionError:
+            return switch, None, "ConnectionError: unable to connect to eAPI"
+
+        except pyeapi.eapilib.CommandError:
+            return switch, None, "CommandError: Check your EOS command syntax"
+
+    def report_switch(self, switch, status):
+        """
+        Streams the result of one switch to the report, if there is one
+        """
+        if self.report is not None:
+            self.report.write_switch(self.report_phase, switch, status)
+
+    def run_on_switches(self, per_switch, on_result=None):
+        """
+        Shared execution engine used by all the Use Cases
+        Calls per_switch(switch) for every switch in self.devices using
+            a pool of self.workers threads, so the run takes as long as
+            the slowest switch instead of the sum of all the switches
+        Results are gathered in the calling thread, so the errors
+            dictionary is only ever updated from one thread
+        If on_result is given, it is called with the switch and the value
+            returned by per_switch as soon as that switch is done.
+            Otherwise returns a dictionary of switch to the value
+            returned by per_switch
+        Errors are streamed to the report as soon as they happen
+        """
+        results = {}
+        if not self.devices:
+            return results
+
+        if self.eapi_client == "async" and not self.nodes:
+            self.prefetch()
+
+        pool = ThreadPool(max(1, min(self.workers, len(self.devices))))
+        try:
+            for switch, result, error in pool.imap_unordered(
+                    lambda switch: self._run_one(per_switch, switch),
+                    self.devices):
+                if error is not None:
+                    self.errors[switch] = error
+                    if self.report is not None:
+                        self.report.write_error(self.report_phase, switch,
+                                                error)
+                elif on_result is not None:
+                    on_result(switch, result)
+                else:
+                    results[switch] = result
+        finally:
+            pool.terminate()
+            pool.join()
+
+        return results
+
+
+def union_commands(use_cases):
+    """
+    Returns the required_commands of all the Use Cases without duplicates,
+        with the enable command first when one of them needs it
+    """
+    commands = []
+    for use_case in use_cases:
+        for command in use_case.required_commands:
+            if command not in commands:
+                commands.append(command)
+
+    if "enable" in commands:
+        commands.remove("enable")
+        commands.insert(0, "enable")
+
+    return commands
+
+
+# Use Case classes of the checks run by the Assessment Tool, in the order
+# they run, see register_check
+CHECKS = []
+
+# Phases of the Use Cases the Assessment Tool runs with code of its own,
+# any other check must be a subclass of Check
+BUILT_IN_PHASES = ("eapi", "topology", "bgp", "mlag")
+
+
+def register_check(use_case):
+    """
+    Adds a Use Case class to the checks of the Assessment Tool
+    Its required_commands are collected together with those of the other
+        checks, in the same request to each switch, and it runs as the
+        report_phase phase of --only and --skip
+    Returns the class, so that it can be used as a class decorator
+    Raises ValueError for a class that is not a subclass of Check, that
+        has no check_switch method, or whose report_phase is already
+        registered
+    """
+    if use_case.report_phase not in BUILT_IN_PHASES:
+        if not issubclass(use_case, Check):
+            raise ValueError("%s cannot be registered as a check, it is "
+                             "not a subclass of Check" % use_case.__name__)
+        if not hasattr(use_case, "check_switch"):
+            raise ValueError("%s cannot be registered as a check, it does "
+                             "not implement check_switch"
+                             % use_case.__name__)
+    if use_case.report_phase in [check.report_phase for check in CHECKS]:
+        raise ValueError("a check named %s is already registered"
+                         % use_case.report_phase)
+    CHECKS.append(use_case)
+    return use_case
+
+
+class Check(DefineEapiVariables):
+
+    """
+        Parent Class of the checks that plug into the Assessment Tool
+            without code of their own in it
+        A check declares the EOS commands it reads in required_commands,
+            its name in report_phase and the headings of its report
+            sections in report_title and error_title, and is registered
+            with register_check
+        It implements check_switch(eos_commands), which returns the status
+            of one switch to report, a dictionary, or an empty one when
+            the switch has nothing to report. eos_commands is the Commands
+            object of the switch
+        The tool collects the commands of all the checks once per switch
+            and every check reads the shared responses
+    """
+
+    # Headings of the validation and error sections of the report
+    report_title = None
+    error_title = None
+
+    def __init__(self, *args, **kwargs):
+        super(Check, self).__init__(*args, **kwargs)
+        self.results = {}
+
+    def run_check(self):
+        self.run_on_switches(self.parse_switch, self.save_switch)
+
+    def parse_switch(self, switch):
+        return self.check_switch(self.commands(switch))
+
+    def save_switch(self, switch, result):
+        if result:
+            self.results[switch] = result
+            self.report_switch(switch, result)
+
+    def restore(self, previous):
+        """
+        Adds the results of a previous run, a dictionary of switch to
+            status, as if the switches had been checked
+        """
+        for switch in previous:
+            self.save_switch(switch, previous[switch])
+
+    def get_results(self):
+        return self.results
+
+    def get_errors(self):
+        return self.errors
+
+
+class Collector(DefineEapiVariables):
+
+    def collect(self, use_cases):
+        """
+        Collection stage run before the Use Cases
+        Sends the union of the required_commands of the Use Cases to
+            every switch in a single batched eAPI request
+        Pass get_nodes() to the Use Cases so that they work from the
+            collected responses instead of connecting to the switches
+        """
+        self.collect_nodes(union_commands(use_cases))
+
+    def get_nodes(self):
+        return self.nodes
 
+
+class Pipeline(DefineEapiVariables):
+
+    """
+        Streaming run of the Use Cases over all the switches
+        Collector threads send the batched request of each switch and
+            push its raw responses into a bounded queue. Parser threads
+            run the Use Cases on the responses of one switch at a time
+            and drop them. The calling thread saves the results and
+            streams them to the report
+        At most queue_size switches of raw responses and of results are
+            held in memory, whatever the size of the fleet, and the
+            parsing of a switch overlaps with the collection of the next
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.queue_size = kwargs.pop("queue_size", 100)
+        self.parsers = kwargs.pop("parsers", 2)
+        super(Pipeline, self).__init__(*args, **kwargs)
+        self.failure = None
+
+    def run(self, use_cases):
+        """
+        Runs the Use Case objects on every switch, in the given order
+        Every Use Case implements parse_switch(switch), which returns the
+            result of one switch without saving it, and save_switch(switch,
+            result), which saves and reports it
+        A switch on which EapiAccess fails is not passed to the other
+            Use Cases, like in the phase by phase run
+        """
+        commands = union_commands(use_cases)
+        switch_queue = Queue.Queue()
+        for switch in self.devices:
+            switch_queue.put(switch)
+        raw_queue = Queue.Queue(self.queue_size)
+        result_queue = Queue.Queue(self.queue_size)
+
+        if self.eapi_client == "async":
+            collectors = [self._thread(self._collect_async_stage,
+                                       switch_queue, raw_queue, commands)]
+        else:
+            collectors = [self._thread(self._collect_stage, switch_queue,
+                                       raw_queue, commands)
+                          for _ in range(max(1, self.workers))]
+        parsers = [self._thread(self._parse_stage, raw_queue, result_queue,
+                                use_cases)
+                   for _ in range(max(1, self.parsers))]
+        self._thread(self._end_of_collection, collectors, raw_queue,
+                     len(parsers))
+
+        finished = 0
+        while finished < len(parsers):
+            # A timeout keeps the wait interruptible with Ctrl-C
+            try:
+                item = result_queue.get(True, 1)
+            except Queue.Empty:
+                continue
+            if item is None:
+                finished += 1
+                continue
+            use_case, switch, result, error = item
+            if error is None:
+                use_case.save_switch(switch, result)
+                continue
+            use_case.errors[switch] = error
+            if use_case.report is not None:
+                use_case.report.write_error(use_case.report_phase, switch,
+                                            error)
+
+        if self.failure is not None:
+            raise self.failure[0], self.failure[1], self.failure[2]
+
+    @staticmethod
+    def _thread(target, *args):
+        thread = threading.Thread(target=target, args=args)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _next_switches(self, switch_queue, count):
+        switches = []
+        while len(switches) < count:
+            try:
+                switches.append(switch_queue.get_nowait())
+            except Queue.Empty:
+                break
+        return switches
+
+    def _collect_stage(self, switch_queue, raw_queue, commands):
+        """
+        Collector thread of the pyeapi client, one switch at a time
+        Switches already in nodes, such as the ones of a snapshot, are
+            passed on without connecting to them
+        """
+        try:
+            while True:
+                switches = self._next_switches(switch_queue, 1)
+                if not switches:
+                    return
+                switch = switches[0]
+                node = self.nodes.get(switch)
+                if node is None:
+                    node = CachedNode()
+                    if self.breaker is None or self.breaker.allow(switch):
+                        node = self._collect_switch(switch, commands)
+                    else:
+                        node.store(commands, pyeapi.eapilib.ConnectionError(
+                            switch, "eAPI of the switch failed too many "
+                                    "times"))
+                raw_queue.put((switch, node))
+        except Exception:
+            self.failure = sys.exc_info()
+
+    def _collect_async_stage(self, switch_queue, raw_queue, commands):
+        """
+        Collector thread of the async client, queue_size switches at a
+            time so that the raw responses held stay bounded
+        """
+        try:
+            while True:
+                switches = self._next_switches(switch_queue,
+                                               self.queue_size)
+                if not switches:
+                    return
+                nodes = dict((switch, self.nodes[switch])
+                             for switch in switches if switch in self.nodes)
+                nodes.update(self._collect_async(
+                    [switch for switch in switches if switch not in nodes],
+                    commands))
+                for switch in switches:
+                    raw_queue.put((switch, nodes.pop(switch)))
+        except Exception:
+            self.failure = sys.exc_info()
+
+    def _end_of_collection(self, collectors, raw_queue, parsers):
+        for collector in collectors:
+            collector.join()
+        for _ in range(parsers):
+            raw_queue.put(None)
+
+    def _parse_stage(self, raw_queue, result_queue, use_cases):
+        """
+        Parser thread, runs the Use Cases on the raw responses of one
+            switch and passes their results on
+        """
+        try:
+            while True:
+                item = raw_queue.get()
+                if item is None:
+                    return
+                switch, node = item
+                for use_case in use_cases:
+                    use_case.nodes[switch] = node
+                    try:
+                        _, result, error = use_case._run_one(
+                            use_case.parse_switch, switch)
+                    finally:
+                        del use_case.nodes[switch]
+                    result_queue.put((use_case, switch, result, error))
+                    if error is not None and isinstance(use_case,
+                                                        EapiAccess):
+                        break
+        except Exception:
+            self.failure = sys.exc_info()
+        finally:
+            result_queue.put(None)
+
+
+class Discovery(DefineEapiVariables):
+
+    required_commands = ["show hostname", "show lldp neighbors detail"]
+    report_phase = "discovery"
+
+    def __init__(self, *args, **kwargs):
+        super(Discovery, self).__init__(*args, **kwargs)
+        self.inventory = []
+        self.unresolved = set()
+
+    def discover(self, max_depth=None):
+        """
+        Builds the switch inventory by crawling the fabric from the seed
+            switches given as devices
+        The crawl is breadth first. Every level of the crawl is polled in
+            parallel with up to self.workers switches at the same time,
+            and the management addresses advertised by their LLDP
+            neighbors form the next level
+        A switch is polled once, even if it is reached through several
+            neighbors or advertised under several names or addresses
+        Returns the list of discovered switch addresses, seeds first.
+            Switches that could not be polled stay in the inventory so
+            that EapiAccess reports them
+        """
+        frontier = list(self.devices)
+        visited_addresses = set(frontier)
+        visited_names = set()
+        self.inventory = list(frontier)
+        depth = 0
+
+        while frontier:
+            # One batched request per switch of the level
+            self.devices = frontier
+            self.collect_nodes(self.required_commands)
+            results = self.run_on_switches(self._get_neighbors)
+            for names, _ in results.values():
+                visited_names.update(names)
+
+            frontier = []
+            depth += 1
+            if max_depth is not None and depth > max_depth:
+                break
+            for switch in self.devices:
+                if switch not in results:
+                    continue
+                for name, address in results[switch][1]:
+                    if address is None:
+                        if name not in visited_names:
+                            self.unresolved.add(name)
+                        continue
+                    if address in visited_addresses or \
+                            (name and name in visited_names):
+                        continue
+                    visited_addresses.add(address)
+                    if name:
+                        visited_names.add(name)
+                    frontier.append(address)
+
+            self.inventory += frontier
+
+        self.unresolved -= visited_names
+        self.devices = self.inventory
+        return self.inventory
+
+    def _get_neighbors(self, switch):
+        eos_commands = self.commands(switch)
+        return eos_commands.hostnames(), eos_commands.getlldpdetail()
+
+    def get_inventory(self):
+        return self.inventory
+
+    def get_unresolved(self):
+        return sorted(self.unresolved)
+
+
+class Fingerprint(DefineEapiVariables):
+
+    required_commands = ["enable", "show running-config",
+                         "show lldp neighbors"]
+    report_phase = "fingerprint"
+
+    def __init__(self, *args, **kwargs):
+        super(Fingerprint, self).__init__(*args, **kwargs)
+        self.fingerprints = {}
+
+    def fingerprint(self):
+        """
+        Records the configuration hash and the LLDP neighbor set of every
+            switch, used by the incremental mode to find the switches
+            that changed since the previous run
+        """
+        if not self.nodes:
+            self.collect_nodes(self.required_commands)
+        self.fingerprints.update(self.run_on_switches(
+            self._fingerprint_switch))
+
+    def _fingerprint_switch(self, switch):
+        eos_commands = self.commands(switch)
+        running_config = eos_commands.runningconfig()
+        config_hash = hashlib.sha1(json.dumps(running_config,
+                                              sort_keys=True)).hexdigest()
+        lldp = sorted([str(neighbor["port"]),
+                       str(neighbor["neighborDevice"]),
+                       str(neighbor["neighborPort"])]
+                      for neighbor in eos_commands.getlldpinfo())
+        return config_hash, lldp
+
+    def get_fingerprints(self):
+        return self.fingerprints
+
+    def parse_switch(self, switch):
+        return self._fingerprint_switch(switch)
+
+    def save_switch(self, switch, result):
+        self.fingerprints[switch] = result
+
+
+@register_check
 class EapiAccess(DefineEapiVariables):
 
+    required_commands = ["show hostname"]
+    report_phase = "eapi"
+
+    def __init__(self, *args, **kwargs):
+        # Hostnames known from a previous run, see inventoryCache
+        self.known_hostnames = kwargs.pop("known_hostnames", {})
+        super(EapiAccess, self).__init__(*args, **kwargs)
+        if self.devices and all(switch in self.known_hostnames
+                                for switch in self.devices):
+            # Every hostname is known, show hostname is not collected and
+            # the reachability of each switch is verified by the first
+            # command the other Use Cases read from it
+            self.required_commands = []
+
     def validate_switches(self):
         """
         This MUST be the first method used by tools script
@@ -116,204 +921,224 @@ class EapiAccess(DefineEapiVariables):
         ALl the other use cases (BGP and MLAG) uses the IP addresses
             that are reachable
         """
-        for switch in self.devices:
-            try:
-                eos_commands = Commands(switch, self.username, self.password)
-                self.hostnames[switch] = eos_commands.hostname()
-
-            except pyeapi.eapilib.ConnectionError:
-                self.errors[switch] = "ConnectionError: unable to connect " \
-                                        "to eAPI"
+        self.hostnames.update(self.run_on_switches(self._get_hostname))
 
-            except pyeapi.eapilib.CommandError:
-                self.errors[switch] = "CommandError: Check your EOS command " \
-                                        "syntax"
+    def _get_hostname(self, switch):
+        if not self.required_commands:
+            return self.known_hostnames[switch]
+        eos_commands = self.commands(switch)
+        return eos_commands.hostname()
 
     def get_hostnames(self):
         return self.hostnames
 
+    def parse_switch(self, switch):
+        return self._get_hostname(switch)
+
+    def save_switch(self, switch, result):
+        self.hostnames[switch] = result
+
     def get_errors(self):
         return self.errors
 
 
+@register_check
 class Plotter(DefineEapiVariables):
 
-    def draw(self):
+    required_commands = ["show lldp neighbors", "show interfaces status"]
+    report_phase = "topology"
+
+    def __init__(self, *args, **kwargs):
+        # Topology file formats written by draw, see topologyExport
+        self.formats = kwargs.pop("formats", ["graphml"])
+        super(Plotter, self).__init__(*args, **kwargs)
+        self.interfaces = {}
+        self.edges = {}
+        self.links = LinkTable()
+
+    def draw(self, known_edges=None):
         """
         networkx script examples
         https://www.udacity.com/wiki/creating-network-graphs-with-python
+        known_edges is a dictionary of switch to (hostname, edges) for
+            switches that are not polled again, such as the unchanged
+            switches of an incremental run. Their edges are added to the
+            graph as they are
         """
-        # Define Graph
+        # Draw Edges
 
-        G = nx.MultiGraph()
+        self.run_on_switches(self._get_edges, self._save_edges)
+        self.write_topology(known_edges)
 
-        # Draw Edges
+    def _save_edges(self, switch, result):
+        edges, self.interfaces[switch] = result
+        self.add_edges(switch, self.devices[switch], edges)
 
-        for switch in self.devices:
-            try:
-                eos_commands = Commands(switch, self.username, self.password)
-                lldpinfo = eos_commands.getlldpinfo()
-                for neighbor in lldpinfo:
-                    print "Scanning details for neighbor %s" \
-                            % (neighbor["neighborDevice"])
-                    localport = neighbor["port"]
-                    remoteport = neighbor["neighborPort"]
-                    speedint = eos_commands.getspeed(localport)
-
-                    edge_key = (neighbor["neighborDevice"] +
-                                "_" +
-                                self.devices[switch] +
-                                "_" +
-                                remoteport +
-                                localport)
-
-                    if (G.has_edge(neighbor["neighborDevice"],
-                            self.devices[switch], key=edge_key) == False):
-                        G.add_edge(self.devices[switch],
-                                   neighbor["neighborDevice"],
-                                   port=localport,
-                                   neighborPort=remoteport,
-                                   speed=speedint,
-                                   key=edge_key)
-
-            except pyeapi.eapilib.ConnectionError:
-                self.errors[switch] = "ConnectionError: unable to connect" \
-                                        " to eAPI"
+    def add_edges(self, switch, hostname, edges):
+        """
+        Adds the LLDP edges seen by one switch to the link table
+        """
+        self.edges[switch] = (hostname, edges)
 
-            except pyeapi.eapilib.CommandError:
-                self.errors[switch] = "CommandError: Check your EOS command" \
-                                        " syntax"
+        # Both ends of a link report it, the link table keeps it once
+
+        for neighbor_device, localport, remoteport, speedint in edges:
+            self.links.add(hostname, localport, neighbor_device,
+                           remoteport, speedint)
+
+    def write_topology(self, known_edges=None):
+        """
+        Writes the link table to the file of every requested format
+        known_edges is a dictionary of switch to (hostname, edges) for
+            switches that are not polled again, such as the unchanged
+            switches of an incremental run. Their edges are added to the
+            graph as they are
+        """
+        if known_edges is not None:
+            for switch in known_edges:
+                self.add_edges(switch, *known_edges[switch])
+
+        # Create Network Graph, streamed to every requested format
+
+        for topology_format in self.formats:
+            file_name, writer = EXPORTERS[topology_format]
+            print "Creating the network diagram file " + file_name
+            writer(self.links, file_name)
+
+    def get_links(self):
+        return self.links
 
-        # Create Network Graph
+    def parse_switch(self, switch):
+        return self._get_edges(switch)
 
-        print "Creating the network diagram file network.graphml"
-        nx.write_graphml(G, 'network.graphml')
+    def save_switch(self, switch, result):
+        # The interface index is not kept, to keep the memory use of the
+        # Pipeline flat
+        edges, _ = result
+        self.add_edges(switch, self.devices[switch], edges)
 
+    def get_edges(self):
+        return self.edges
 
+    def get_interfaces(self):
+        return self.interfaces
+
+    def _get_edges(self, switch):
+        """
+        Collects the LLDP neighbors and the link speed of one switch
+        The link speed is looked up in the interface index of the switch,
+            so show interfaces status runs once per switch, not per link
+        Returns the edges and the interface index
+        Called by draw method
+        """
+        edges = []
+        eos_commands = self.commands(switch)
+        lldpinfo = eos_commands.getlldpinfo()
+        for neighbor in lldpinfo:
+            print "Scanning details for neighbor %s" \
+                    % (neighbor["neighborDevice"])
+            localport = neighbor["port"]
+            remoteport = neighbor["neighborPort"]
+            speedint = eos_commands.getspeed(localport)
+            edges.append((neighbor["neighborDevice"], localport,
+                          remoteport, speedint))
+
+        return edges, eos_commands.interfaces()
+
+
+@register_check
 class BgpValidate(DefineEapiVariables):
 
-    def __init__(self, devices, username, password):
-        super(BgpValidate, self).__init__(devices, username, password)
+    # show ipv6 bgp summary is left out of the batch, a switch that
+    # rejects it would make every command of the batch go one by one
+    required_commands = ["enable", "show running-config section router bgp",
+                         "show ip bgp summary vrf all"]
+    report_phase = "bgp"
+
+    def __init__(self, *args, **kwargs):
+        super(BgpValidate, self).__init__(*args, **kwargs)
         self.bgp_status = {}
+        self.payload_sizes = {}
+        self.bgp_peers = {}
+
+    # Compiled once, used for every neighbor/network statement
+    pattern_ipv4 = re.compile(r'((([0-9]){1,3})\.){3}([0-9]){1,3}')
+    pattern_ipv6 = re.compile(r'^[0-9a-fA-F]{0,4}(:[0-9a-fA-F]{0,4}){2,7}'
+                              r'(/[0-9]{1,3})?$')
 
     @staticmethod
     def is_ipv4_ipv6(neighbor_data):
         """
         Verifies whether the address in neighbor/network statement is
-        an  IPv4 address.
+        an IPv4 or an IPv6 address.
         Called by bgp_statement_parser method
         """
-        pattern_ip = re.compile(r'((([0-9]){1,3})\.){3}([0-9]){1,3}')
-        is_ipv4 = pattern_ip.search(neighbor_data)
-        if bool(is_ipv4):
+        if BgpValidate.pattern_ipv4.search(neighbor_data):
             return "ipv4"
+        if BgpValidate.pattern_ipv6.match(neighbor_data):
+            return "ipv6"
         return "None"
 
     @staticmethod
-    def find_bgp_neighbors(bgp_data, each_statement, vrf):
+    def _add_bgp_entry(bgp_data, seen, vrf, kind, address):
         """
-        Retrieves IP addresses from neighbor <x.y.z.w> statement
-        Called by bgp_statement_parser method
+        Appends the address to bgp_data[vrf][kind] unless already there
+        seen holds a set per VRF and kind, so the duplicate check does not
+            depend on the number of neighbors already found
         """
-        if vrf not in bgp_data.keys():
-            bgp_data[vrf] = {}
+        if vrf not in bgp_data:
+            bgp_data[vrf] = {"neighbors": [], "networks": []}
+            seen[vrf] = {"neighbors": set(), "networks": set()}
 
-        if "neighbors" not in bgp_data[vrf]:
-            bgp_data[vrf]["neighbors"] = []
+        if address not in seen[vrf][kind]:
+            seen[vrf][kind].add(address)
+            bgp_data[vrf][kind].append(address)
 
-        if each_statement.split()[1] not in bgp_data[vrf]["neighbors"]:
-            bgp_data[vrf]["neighbors"].append(str(each_statement.split()[1]))
-
-        return bgp_data
-
-    @staticmethod
-    def find_bgp_networks(bgp_data, each_statement, vrf):
+    def _parse_bgp_block(self, bgp_data, seen, bgp_config, vrf, top_level):
         """
-        Retrieves network address from the network <x.y.z.0/24> statement
+        Parses the statements of one block of the BGP configuration
+        Each statement is split once and dispatched on its first word
+        Address families contribute their network statements, and at the
+            top level every vrf block is parsed with its own VRF name
         Called by bgp_statement_parser method
         """
-        if vrf not in bgp_data.keys():
-            bgp_data[vrf] = {}
-
-        if "networks" not in bgp_data[vrf]:
-            bgp_data[vrf]["networks"] = []
-
-        if each_statement.split()[1] not in bgp_data[vrf]["networks"]:
-            bgp_data[vrf]["networks"].append(str(each_statement.split()[1]))
-
-        return bgp_data
+        for each_statement in bgp_config:
+            words = each_statement.split()
+            if len(words) < 2:
+                continue
+
+            if words[0] in ("neighbor", "network"):
+                if self.is_ipv4_ipv6(words[1]) != "None":
+                    kind = "neighbors" if words[0] == "neighbor" \
+                        else "networks"
+                    self._add_bgp_entry(bgp_data, seen, vrf, kind,
+                                        str(words[1]))
+
+            elif words[0] == "address-family" and \
+                    words[1] in ("ipv4", "ipv6"):
+                for each_statement_within_af in \
+                        bgp_config[each_statement]["cmds"]:
+                    af_words = each_statement_within_af.split()
+                    if (len(af_words) > 1 and af_words[0] == "network" and
+                            self.is_ipv4_ipv6(af_words[1]) != "None"):
+                        self._add_bgp_entry(bgp_data, seen, vrf,
+                                            "networks", str(af_words[1]))
+
+            elif words[0] == "vrf" and top_level:
+                self._parse_bgp_block(bgp_data, seen,
+                                      bgp_config[each_statement]["cmds"],
+                                      str(words[1]), False)
 
     def bgp_statement_parser(self, bgp_config):
         """
-        Retrieves BGP Neighbor IP addresses from the BGP configuration
+        Retrieves BGP Neighbor IP addresses (IPv4 and IPv6) from the BGP
+            configuration
         Also retrieves Network addresses advertised using network statement
+        Single pass over the configuration, linear in its size
         This method is called by bgp_validate method.
         """
         bgp_data = {}
-        for each_statement in bgp_config:
-            if not each_statement.find("neighbor"):
-                verify_ipv4_ipv6 = self.is_ipv4_ipv6(each_statement.split()[1])
-                if verify_ipv4_ipv6 == "ipv4":
-                    vrf = "default"
-                    bgp_data = self.find_bgp_neighbors(bgp_data,
-                                                       each_statement, vrf)
-
-            if not each_statement.find("network"):
-                verify_ipv4_ipv6_subnet = self.is_ipv4_ipv6(
-                    each_statement.split()[1]
-                    )
-                if verify_ipv4_ipv6_subnet == "ipv4":
-                    vrf = "default"
-                    bgp_data = self.find_bgp_networks(
-                        bgp_data, each_statement, vrf
-                        )
-
-            if not each_statement.find("address-family ipv4"):
-                bgp_per_af_config = bgp_config[each_statement]["cmds"]
-                vrf = "default"
-
-                for each_statement_within_af in bgp_per_af_config:
-                    if not each_statement_within_af.find("network"):
-                        bgp_data = self.find_bgp_networks(
-                            bgp_data, each_statement_within_af, vrf
-                            )
-
-            if not each_statement.find("vrf"):
-                vrf = str(each_statement.split()[1])
-                bgp_per_vrf_config = bgp_config[each_statement]["cmds"]
-
-                for each_statement_within_vrf in bgp_per_vrf_config:
-                    if not each_statement_within_vrf.find("neighbor"):
-                        verify_ipv4_ipv6 = self.is_ipv4_ipv6(
-                            each_statement_within_vrf.split()[1]
-                            )
-                        if verify_ipv4_ipv6 == "ipv4":
-                            bgp_data = self.find_bgp_neighbors(
-                                bgp_data, each_statement_within_vrf, vrf
-                                )
-
-                    if not each_statement_within_vrf.find("network"):
-                        verify_ipv4_ipv6_subnet = self.is_ipv4_ipv6(
-                            each_statement_within_vrf.split()[1]
-                            )
-                        if verify_ipv4_ipv6_subnet == "ipv4":
-                            bgp_data = self.find_bgp_networks(
-                                bgp_data, each_statement_within_vrf, vrf
-                                )
-
-                    if not each_statement_within_vrf.find(
-                            "address-family ipv4"):
-                        bgp_per_vrf_af_config = (bgp_per_vrf_config
-                                                 [each_statement_within_vrf]
-                                                 ["cmds"])
-
-                        for each_statement_within_vrf_af in \
-                                bgp_per_vrf_af_config:
-                            if (not each_statement_within_vrf_af.find
-                                    ("network")):
-                                bgp_data = self.find_bgp_networks(
-                                    bgp_data, each_statement_within_vrf_af, vrf
-                                    )
+        self._parse_bgp_block(bgp_data, {}, bgp_config, "default", True)
 
         return bgp_data
 
@@ -332,6 +1157,56 @@ class BgpValidate(DefineEapiVariables):
 
         return bgp_config
 
+    @staticmethod
+    def merge_bgp_summaries(bgp_summary, ipv6_bgp_summary):
+        """
+        Adds the IPv6 peers to the IPv4 show ip bgp summary, per VRF
+        This method is called by bgp_validate method.
+        """
+        for each_vrf in ipv6_bgp_summary:
+            if each_vrf not in bgp_summary:
+                bgp_summary[each_vrf] = {"peers": {}}
+            bgp_summary[each_vrf].setdefault("peers", {}).update(
+                ipv6_bgp_summary[each_vrf].get("peers", {}))
+
+        return bgp_summary
+
+    def ipv6_bgp_summary(self, switch, eos_commands):
+        """
+        Returns show ipv6 bgp summary, collected with a request of its own
+            when the responses of the switch were collected in advance
+        A switch that rejects the command has no IPv6 peers to add
+        This method is called by bgp_validate method.
+        """
+        node = eos_commands.node
+        if isinstance(node, CachedNode) and \
+                "show ipv6 bgp summary vrf all" not in node.results:
+            eos_commands = Commands(switch, self.username, self.password,
+                                    self.connect(switch))
+        try:
+            return eos_commands.ipv6bgpsummary()
+        except pyeapi.eapilib.CommandError:
+            return {}
+
+    @staticmethod
+    def bgp_summary_peers(bgp_summary):
+        """
+        Returns every peer of show ip bgp summary as a [vrf, peer, state,
+            asn, prefixes received, up/down time] row, for the fleet wide
+            BgpPeerTable
+        This method is called by bgp_validate method.
+        """
+        rows = []
+        for each_vrf in bgp_summary:
+            peers = bgp_summary[each_vrf].get("peers", {})
+            for each_peer in peers:
+                peer = peers[each_peer]
+                rows.append([each_vrf, each_peer, peer.get("peerState", ""),
+                             str(peer.get("asn", "")),
+                             peer.get("prefixReceived", 0),
+                             peer.get("upDownTime", 0.0)])
+        return rows
+
     @staticmethod
     def bgp_status_check(bgp_config, bgp_summary):
         """
@@ -375,68 +1250,113 @@ class BgpValidate(DefineEapiVariables):
     def bgp_validate(self):
         """
         1. This is the method called from the Assessment Tool
-        2. This method collects the show run using Commands Class
+        2. This method collects the router bgp section of the show run
+            using Commands Class and records its size in payload_sizes
         3. Checks if BGP is configured using bgp_config_exist static method.
         4. Retrieves BGP Configuration from the show run
             using bgp_statement_parser method.
         5. Collect show ip bgp summary using Commands Class
         6. Checks BGP Adjacency using bgp_status_check static method.
         7. Document BGP Adjacency state in the bgp_status dictionary
+            and every peer of the summary in the bgp_peers dictionary
         8. Document eAPI connectivity issues in errors dictionary
 
         """
-        for switch in self.devices:
-            self.bgp_status[switch] = {}
-            try:
-                eos_commands = Commands(switch, self.username, self.password)
+        self.run_on_switches(self._bgp_validate_switch,
+                             self._save_bgp_status)
 
-                # Collect Show run
-                running_config = eos_commands.runningconfig()
+    def _save_bgp_status(self, switch, result):
+        """
+        Saves the BGP result of one switch as soon as it is done and
+            streams it to the report
+        Called by bgp_validate method
+        """
+        status, self.payload_sizes[switch], self.bgp_peers[switch] = result
+        if status:
+            """
+            Switches with no BGP neighbors to report are not added
+            to the bgp_status dictionary
+            """
+            self.bgp_status[switch] = status
+            self.report_switch(switch, status)
+
+    def parse_switch(self, switch):
+        return self._bgp_validate_switch(switch)
+
+    def save_switch(self, switch, result):
+        self._save_bgp_status(switch, result)
+
+    def restore(self, previous):
+        """
+        Adds the BGP results of a previous run, a dictionary of switch to
+            (status, payload size, peer rows), as if the switches had been
+            validated
+        """
+        for switch in previous:
+            self._save_bgp_status(switch, previous[switch])
 
-                # Verify BGP is configured
-                bgp_config = self.bgp_config_exist(running_config)
+    def _bgp_validate_switch(self, switch):
+        """
+        Runs the BGP validation steps for one switch
+        Called by bgp_validate method
+        """
+        eos_commands = self.commands(switch)
 
-                if "None" not in bgp_config:
-                    # If configured, retrieve BGP Neighbor IP addresses
-                    get_bgp_config = self.bgp_statement_parser(bgp_config)
+        # Collect the router bgp section of the show run
+        running_config = eos_commands.bgpconfig()
+        payload_size = len(json.dumps(running_config))
 
-                    # Collect show ip bgp summary
-                    bgp_summary = eos_commands.bgpsummary()
+        # Verify BGP is configured
+        bgp_config = self.bgp_config_exist(running_config)
 
-                    # Validate BGP Adjacency
-                    self.bgp_status[switch] = self.bgp_status_check(
-                        get_bgp_config, bgp_summary)
+        if "None" not in bgp_config:
+            # If configured, retrieve BGP Neighbor IP addresses
+            get_bgp_config = self.bgp_statement_parser(bgp_config)
 
-                else:
-                    # If BGP configuration not found, document it
-                    self.bgp_status[switch] = (
-                        "BGP is not configured on this switch.")
+            # Collect show ip bgp summary
+            bgp_summary = eos_commands.bgpsummary()
 
-            except pyeapi.eapilib.ConnectionError:
-                self.errors[switch] = (
-                    "ConnectionError: unable to connect to eAPI")
+            # IPv6 peers are only listed by show ipv6 bgp summary
+            if any(":" in neighbor
+                   for each_vrf in get_bgp_config.values()
+                   for neighbor in each_vrf["neighbors"]):
+                bgp_summary = self.merge_bgp_summaries(
+                    bgp_summary, self.ipv6_bgp_summary(switch, eos_commands))
 
-            except pyeapi.eapilib.CommandError:
-                self.errors[switch] = (
-                    "CommandError: Check your EOS command syntax")
+            # Validate BGP Adjacency
+            return (self.bgp_status_check(get_bgp_config, bgp_summary),
+                    payload_size, self.bgp_summary_peers(bgp_summary))
 
-            if not self.bgp_status[switch]:
-                """
-                If unable to connect to switch, delete entry for that switch
-                in the bgp_status dictionary
-                """
-                del self.bgp_status[switch]
+        # If BGP configuration not found, document it
+        return "BGP is not configured on this switch.", payload_size, []
 
     def get_bgp_status(self):
         return self.bgp_status
 
+    def get_payload_sizes(self):
+        """
+        Returns the size in bytes of the JSON BGP configuration collected
+            from each switch
+        """
+        return self.payload_sizes
+
+    def get_bgp_peers(self):
+        """
+        Returns the peer rows of show ip bgp summary of each switch
+        """
+        return self.bgp_peers
+
     def get_errors(self):
         return self.errors
 
+@register_check
 class MlagValidate(DefineEapiVariables):
 
-    def __init__(self, devices, username, password):
-        super(MlagValidate, self).__init__(devices, username, password)
+    required_commands = ["show mlag"]
+    report_phase = "mlag"
+
+    def __init__(self, *args, **kwargs):
+        super(MlagValidate, self).__init__(*args, **kwargs)
         self.mlag_status = {}
 
     @staticmethod
@@ -473,28 +1393,37 @@ class MlagValidate(DefineEapiVariables):
 
     def mlag_validate(self):
 
-        for switch in self.devices:
-            self.mlag_status[switch] = {}
-            try:
-                eos_commands = Commands(switch, self.username, self.password)
+        self.run_on_switches(self._mlag_validate_switch,
+                             self._save_mlag_status)
 
-                # Execute the desired command
-                show_mlag = eos_commands.mlag()
-                self.mlag_status[switch] = self.mlag_status_check(show_mlag)
+    def parse_switch(self, switch):
+        return self._mlag_validate_switch(switch)
 
-            except pyeapi.eapilib.ConnectionError:
-                self.errors[switch] = (
-                    "ConnectionError: unable to connect to eAPI")
+    def save_switch(self, switch, result):
+        self._save_mlag_status(switch, result)
 
-            except pyeapi.eapilib.CommandError:
-                self.errors[switch] = (
-                    "CommandError: Check your EOS command syntax")
+    def restore(self, previous):
+        """
+        Adds the MLAG results of a previous run, a dictionary of switch to
+            status, as if the switches had been validated
+        """
+        for switch in previous:
+            self._save_mlag_status(switch, previous[switch])
 
-            if not self.mlag_status[switch]:
-                del self.mlag_status[switch]
+    def _save_mlag_status(self, switch, status):
+        if status:
+            self.mlag_status[switch] = status
+            self.report_switch(switch, status)
+
+    def _mlag_validate_switch(self, switch):
+        eos_commands = self.commands(switch)
+
+        # Execute the desired command
+        show_mlag = eos_commands.mlag()
+        return self.mlag_status_check(show_mlag)
 
     def get_mlag_status(self):
         return self.mlag_status
 
     def get_errors(self):
-        return self.errors
\ No newline at end of file
+        return self.errors
@@ -0,0 +1,400 @@
+# Copyright (c) 2016, Arista Networks, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+#   Neither the name of Arista Networks nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL ARISTA NETWORKS
+# BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+# BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
+# IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#
+# Author = Anees Mohammed
+#
+
+
+"""
+    Microbenchmarks of the parsers of the Assessment Tool
+
+    Builds synthetic running-config, BGP summary, MLAG and LLDP payloads
+    of a configurable size, times every parser on them and reports its
+    memory: the peak KiB it allocates with tracemalloc, or else the KiB of
+    the objects it builds and keeps. Times are also given relative to a
+    fixed pure Python workload run on the same machine, so that a baseline
+    saved on one machine can be compared on another one. The run fails
+    when a parser is slower, or uses more memory, than the baseline
+    allows:
+
+    python parserBenchmark.py
+    python parserBenchmark.py --peers 50,500,5000 --save-baseline
+"""
+
+import argparse
+import copy
+import gc
+import json
+import os
+import random
+import sys
+import time
+import types
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2 has no tracemalloc unless the pytracemalloc backport is
+    # installed, the size of the objects a parser builds and keeps is
+    # used instead. It misses the temporary allocations of a parser
+    tracemalloc = None
+
+from networkAssessmentComponents import BgpValidate, MlagValidate, Plotter
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "parser_baseline.json")
+
+
+def _peer_address(vrf, peer):
+    return "10.%d.%d.%d" % (vrf, peer >> 8 & 255, peer & 255)
+
+
+def make_bgp_config(vrfs, peers):
+    """
+    Returns the show running-config section router bgp result of a
+        switch with peers neighbors and networks in the default VRF and
+        in each of the other vrfs - 1 VRFs
+    """
+    def block(vrf):
+        cmds = {"router-id 1.1.1.%d" % vrf: None,
+                "maximum-paths 4 ecmp 4": None}
+        for peer in range(peers):
+            address = _peer_address(vrf, peer)
+            cmds["neighbor %s remote-as %d" % (address, 65100 + peer)] = None
+            cmds["neighbor %s description peer%d" % (address, peer)] = None
+        networks = dict(("network 172.%d.%d.0/24" % (vrf, network), None)
+                        for network in range(peers // 10 + 1))
+        cmds["address-family ipv4"] = {"cmds": networks}
+        return cmds
+
+    router_bgp = block(0)
+    for vrf in range(1, vrfs):
+        router_bgp["vrf vrf%d" % vrf] = {"cmds": block(vrf)}
+    return {"router bgp 65000": {"cmds": router_bgp}}
+
+
+def make_bgp_summary(vrfs, peers, down_rate=0.1, seed=0):
+    """
+    Returns the vrfs of show ip bgp summary vrf all matching
+        make_bgp_config, with down_rate of the peers not Established
+    """
+    states = random.Random(seed)
+    summary = {}
+    for vrf in range(vrfs):
+        vrf_peers = {}
+        for peer in range(peers):
+            state = "Established"
+            if states.random() < down_rate:
+                state = "Active"
+            vrf_peers[_peer_address(vrf, peer)] = {
+                "peerState": state, "asn": str(65100 + peer),
+                "prefixReceived": 10, "upDownTime": 1476000000.0}
+        summary["default" if vrf == 0 else "vrf%d" % vrf] = {
+            "peers": vrf_peers, "asn": "65000", "routerId": "1.1.1.1"}
+    return summary
+
+
+def make_show_mlag(ports):
+    return {"domainId": "mlag1", "localInterface": "Vlan4094",
+            "peerLink": "Port-Channel2000", "state": "active",
+            "mlagPorts": {"Active-full": ports - 2, "Inactive": 1,
+                          "Active-partial": 1, "Disabled": 0,
+                          "Configured": ports}}
+
+
+def make_lldp_fabric(switches, neighbors):
+    """
+    Returns the switch to (hostname, edges) LLDP view of a fabric where
+        every switch has neighbors links to the next switches, seen from
+        both of their ends like on real switches
+    """
+    fabric = dict(("switch%d" % index, ("switch%d" % index, []))
+                  for index in range(switches))
+    for index in range(switches):
+        for link in range(neighbors // 2):
+            neighbor = (index + link + 1) % switches
+            local_port = "Ethernet%d" % (link + 1)
+            remote_port = "Ethernet%d" % (neighbors // 2 + link + 1)
+            fabric["switch%d" % index][1].append(
+                ("switch%d" % neighbor, local_port, remote_port, 100))
+            fabric["switch%d" % neighbor][1].append(
+                ("switch%d" % index, remote_port, local_port, 100))
+    return fabric
+
+
+def add_fabric_edges(plotter, fabric):
+    for switch in fabric:
+        plotter.add_edges(switch, *fabric[switch])
+
+
+def calibrate(repeat):
+    """
+    Returns the best time of a fixed pure Python workload of dictionary,
+        string and sorting operations, the unit of the relative times
+    """
+    def workload():
+        table = {}
+        for number in range(200000):
+            table["key%d" % number] = number
+        return sorted(table, reverse=True)
+
+    return measure_time(workload, lambda: (), repeat)
+
+
+def measure_time(function, setup, repeat):
+    """
+    Returns the best time of repeat calls of function on fresh arguments
+        from setup, with the garbage collector off like timeit does
+    """
+    best = None
+    for _ in range(repeat):
+        arguments = setup()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.time()
+            function(*arguments)
+            elapsed = time.time() - start
+        finally:
+            gc.enable()
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+# Objects shared by the whole process, never built by a parser
+SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType,
+                 types.MethodType, types.BuiltinFunctionType)
+
+
+def object_sizes(value):
+    """
+    Returns the dictionary of id to size in bytes of value and of the
+        containers and instances it reaches
+    """
+    sizes = {}
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if id(item) in sizes or isinstance(item, SKIPPED_TYPES):
+            continue
+        sizes[id(item)] = sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__"):
+            stack.append(item.__dict__)
+    return sizes
+
+
+def measure_memory(function, setup):
+    """
+    Returns the peak KiB allocated by one call with tracemalloc, or else
+        the KiB of the objects the call builds and keeps, and by which it
+        grows its arguments, which some parsers fill in place
+    """
+    arguments = setup()
+    gc.collect()
+    if tracemalloc is not None:
+        tracemalloc.start()
+        function(*arguments)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak // 1024
+    before = object_sizes(arguments)
+    result = function(*arguments)
+    after = object_sizes((result, arguments))
+    retained = sum(max(0, size - before.get(key, 0))
+                   for key, size in after.items())
+    return retained // 1024
+
+
+def benchmarks(args):
+    """
+    Yields (name, scale, function, setup) for every benchmark, where
+        setup returns fresh arguments for one call of function
+    """
+    bgp = BgpValidate([], None, None)
+    for peers in args.peers:
+        scale = "vrfs=%d,peers=%d" % (args.vrfs, peers)
+        running_config = make_bgp_config(args.vrfs, peers)
+        bgp_config = BgpValidate.bgp_config_exist(running_config)
+        bgp_data = bgp.bgp_statement_parser(bgp_config)
+        bgp_summary = make_bgp_summary(args.vrfs, peers)
+
+        yield ("BgpValidate.bgp_config_exist", scale,
+               BgpValidate.bgp_config_exist,
+               lambda: (copy.deepcopy(running_config),))
+        yield ("BgpValidate.bgp_statement_parser", scale,
+               bgp.bgp_statement_parser, lambda: (bgp_config,))
+        yield ("BgpValidate.bgp_status_check", scale,
+               BgpValidate.bgp_status_check,
+               lambda: (bgp_data, bgp_summary))
+        yield ("BgpValidate.bgp_summary_peers", scale,
+               BgpValidate.bgp_summary_peers, lambda: (bgp_summary,))
+
+    show_mlag = make_show_mlag(args.mlag_ports)
+    yield ("MlagValidate.mlag_status_check", "ports=%d" % args.mlag_ports,
+           MlagValidate.mlag_status_check, lambda: (show_mlag,))
+
+    fabric = make_lldp_fabric(args.switches, args.neighbors)
+    yield ("Plotter.add_edges", "switches=%d,neighbors=%d"
+           % (args.switches, args.neighbors), add_fabric_edges,
+           lambda: (Plotter([], None, None), fabric))
+
+
+def compare(results, baseline, calibration, time_tolerance,
+            memory_tolerance, min_seconds):
+    """
+    Returns the list of regressions of results against the baseline
+    A time only regresses when it is also min_seconds slower than the
+        baseline, so that the noise of the fastest parsers is ignored
+    """
+    regressions = []
+    for key in sorted(results):
+        if key not in baseline["results"]:
+            continue
+        result = results[key]
+        previous = baseline["results"][key]
+        slower = (result["relative"] - previous["relative"]) * calibration
+        if result["relative"] > previous["relative"] * (1 + time_tolerance) \
+                and slower > min_seconds:
+            regressions.append("%s: %.3f ms, %.4f of the calibration time "
+                               "against %.4f in the baseline"
+                               % (key, result["seconds"] * 1000,
+                                  result["relative"], previous["relative"]))
+        if baseline["memory_metric"] == memory_metric() and \
+                result["memory_kib"] > \
+                previous["memory_kib"] * (1 + memory_tolerance) + 16:
+            regressions.append("%s: %d %s, baseline %d"
+                               % (key, result["memory_kib"],
+                                  memory_metric(), previous["memory_kib"]))
+    return regressions
+
+
+def memory_metric():
+    return "peak_kib" if tracemalloc is not None else "retained_kib"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Microbenchmarks of the Assessment Tool parsers")
+    parser.add_argument("--peers", default="50,500,5000",
+                        help="comma separated BGP peers per VRF "
+                             "(default: 50,500,5000)")
+    parser.add_argument("--vrfs", type=int, default=4)
+    parser.add_argument("--switches", type=int, default=500,
+                        help="switches of the LLDP fabric (default: 500)")
+    parser.add_argument("--neighbors", type=int, default=64,
+                        help="LLDP neighbors per switch (default: 64)")
+    parser.add_argument("--mlag-ports", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="runs of every benchmark, the best one "
+                             "counts (default: 5)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="baseline file (default: parser_baseline.json "
+                             "next to this script)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="save the results as the new baseline instead "
+                             "of comparing them")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="fraction by which a relative time may exceed "
+                             "the baseline (default: 0.5)")
+    parser.add_argument("--min-seconds", type=float, default=0.005,
+                        help="smallest slow down that counts as a "
+                             "regression (default: 0.005)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.2,
+                        help="fraction by which the peak KiB allocated, or "
+                             "without tracemalloc the KiB retained, may "
+                             "exceed the baseline (default: 0.2)")
+    parser.add_argument("--json", metavar="FILE",
+                        help="also write the results to FILE as JSON")
+    args = parser.parse_args()
+    args.peers = [int(peers) for peers in args.peers.split(",")]
+
+    calibration = calibrate(args.repeat)
+    print "%-34s %-24s %10s %10s" % ("function", "scale", "best ms",
+                                     memory_metric())
+
+    results = {}
+    for name, scale, function, setup in benchmarks(args):
+        seconds = measure_time(function, setup, args.repeat)
+        memory = measure_memory(function, setup)
+        results["%s[%s]" % (name, scale)] = {"seconds": seconds,
+                                             "memory_kib": memory}
+        print "%-34s %-24s %10.3f %10d" % (name, scale, seconds * 1000,
+                                           memory)
+
+    # The machine may speed up or slow down during the run, the fastest
+    # of the calibrations before and after the benchmarks is the unit
+    calibration = min(calibration, calibrate(args.repeat))
+    print "Calibration workload: %.1f ms" % (calibration * 1000)
+    for key in results:
+        results[key]["relative"] = results[key]["seconds"] / calibration
+
+    run = {"calibration_seconds": calibration,
+           "memory_metric": memory_metric(),
+           "python": sys.version.split()[0],
+           "results": results}
+    if args.json:
+        with open(args.json, "w") as writefile:
+            json.dump(run, writefile, indent=2, sort_keys=True,
+                      separators=(",", ": "))
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as writefile:
+            json.dump(run, writefile, indent=2, sort_keys=True,
+                      separators=(",", ": "))
+        print "Baseline saved in " + args.baseline
+        return
+
+    if not os.path.exists(args.baseline):
+        print "No baseline in %s, save one with --save-baseline" \
+            % args.baseline
+        return
+
+    with open(args.baseline) as readfile:
+        baseline = json.load(readfile)
+    regressions = compare(results, baseline, calibration, args.tolerance,
+                          args.memory_tolerance, args.min_seconds)
+    if regressions:
+        print "Regressions against " + args.baseline
+        for regression in regressions:
+            print "  " + regression
+        sys.exit(1)
+    print "No regression against " + args.baseline
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# Copyright (c) 2016, Arista Networks, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+#   Neither the name of Arista Networks nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL ARISTA NETWORKS
+# BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+# BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
+# IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#
+# Author = Anees Mohammed
+#
+
+import cgi
+import json
+import tempfile
+
+
+# Heading of the validation section written for each phase
+VALIDATION_SECTIONS = {"cabling": "Cabling Plan Validation",
+                       "bgp": "BGP Validation",
+                       "mlag": "MLAG Validation"}
+
+# Order of the validation sections when they are spooled
+VALIDATION_ORDER = ["cabling", "bgp", "mlag"]
+
+# Heading of the error sections, in the order they appear in the report
+ERROR_SECTIONS = [("eapi", "eAPI or Switch Connectivity Issues"),
+                  ("topology", "Network Topology Related EOS Commands Error"),
+                  ("bgp", "BGP Assessment Related EOS Commands Error"),
+                  ("mlag", "MLAG Assessment Related EOS Commands Error")]
+
+
+class ReportWriter(object):
+
+    """
+        Streams the assessment report to an HTML file and a NDJSON file
+        Every switch is written and flushed as soon as its result is known,
+            so the report of an interrupted run holds every switch that
+            completed. Errors go to the NDJSON file right away and are
+            spooled to temporary files until the eAPI Access Issues
+            section is written by close(), so memory use does not grow
+            with the size of the fleet
+        With spool_sections, the validation sections are spooled the
+            same way and written in order by close(), for runs where the
+            results of the phases arrive interleaved
+    """
+
+    def __init__(self, html_file, ndjson_file, header, spool_sections=False):
+        self.html = open(html_file, "w")
+        self.ndjson = open(ndjson_file, "w")
+        self.current_section = None
+        self.spool_sections = spool_sections
+        self.section_spools = {}
+        self.error_spools = {}
+        self.validation_sections = dict(VALIDATION_SECTIONS)
+        self.validation_order = list(VALIDATION_ORDER)
+        self.error_sections = list(ERROR_SECTIONS)
+        self.html.write(header)
+        self.html.flush()
+
+    def add_section(self, phase, title, error_title):
+        """
+        Adds the validation and error sections of a check plugged in
+            after the built in ones, see networkAssessmentComponents.Check
+        """
+        if phase in self.validation_sections:
+            return
+        self.validation_sections[phase] = title
+        self.validation_order.append(phase)
+        self.error_sections.append((phase, error_title))
+
+    @staticmethod
+    def _paragraph(key, value):
+        return "<p>%s :  %s</p>" % (cgi.escape(str(key)),
+                                    cgi.escape(str(value)))
+
+    def _write_ndjson(self, record):
+        self.ndjson.write(json.dumps(record) + "\n")
+        self.ndjson.flush()
+
+    def _section(self, phase):
+        """
+        Returns the file the HTML of the validation section of the phase
+            is written to
+        """
+        if self.spool_sections:
+            if phase not in self.section_spools:
+                self.section_spools[phase] = tempfile.TemporaryFile()
+            return self.section_spools[phase]
+
+        if self.current_section != phase:
+            self.current_section = phase
+            self.html.write(" <h1>%s</h1>\n    "
+                            % self.validation_sections[phase])
+        return self.html
+
+    def write_switch(self, phase, switch, status):
+        """
+        Writes the validation result of one switch for the phase
+        """
+        html = self._section(phase)
+        html.write("<h2>%s</h2>" % cgi.escape(str(switch)))
+        if not isinstance(status, dict):
+            html.write("<p>%s</p>" % cgi.escape(str(status)))
+        elif phase == "bgp":
+            for each_vrf in status:
+                html.write("<h3>%s</h3>" % cgi.escape(str(each_vrf)))
+                for key in status[each_vrf]:
+                    html.write(self._paragraph(key, status[each_vrf][key]))
+        else:
+            for key in status:
+                html.write(self._paragraph(key, status[key]))
+        html.write("\n")
+        html.flush()
+
+        self._write_ndjson({"phase": phase, "switch": switch,
+                            "status": status})
+
+    def write_section(self, phase, sections):
+        """
+        Writes the network wide result of a phase, a list of (heading,
+            entries) where entries is a list of text lines
+        """
+        html = self._section(phase)
+        for heading, entries in sections:
+            html.write("<h2>%s (%d)</h2>" % (cgi.escape(str(heading)),
+                                            len(entries)))
+            for entry in entries:
+                html.write("<p>%s</p>" % cgi.escape(entry))
+                self._write_ndjson({"phase": phase, "section": heading,
+                                    "entry": entry})
+            html.write("\n")
+        html.flush()
+
+    def write_error(self, phase, switch, error):
+        """
+        Records the eAPI error of one switch for the phase
+        """
+        if phase not in self.error_spools:
+            self.error_spools[phase] = tempfile.TemporaryFile()
+        self.error_spools[phase].write(self._paragraph(switch, error) + "\n")
+
+        self._write_ndjson({"phase": phase, "switch": switch,
+                            "error": error})
+
+    def close(self):
+        """
+        Writes the spooled validation sections and the eAPI Access
+            Issues section, and closes both files
+        """
+        for phase in self.validation_order:
+            if phase not in self.section_spools:
+                continue
+            self.html.write(" <h1>%s</h1>\n    "
+                            % self.validation_sections[phase])
+            spool = self.section_spools.pop(phase)
+            spool.seek(0)
+            for line in spool:
+                self.html.write(line)
+            spool.close()
+
+        if self.error_spools:
+            self.html.write(" <h1>eAPI Access Issues</h1>\n    ")
+        for phase, title in self.error_sections:
+            if phase not in self.error_spools:
+                continue
+            self.html.write("<h2>%s</h2>" % title)
+            spool = self.error_spools.pop(phase)
+            spool.seek(0)
+            for line in spool:
+                self.html.write(line)
+            spool.close()
+
+        self.html.write("</body>\n</html>\n")
+        self.html.close()
+        self.ndjson.close()
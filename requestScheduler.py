@@ -0,0 +1,200 @@
+# Copyright (c) 2016, Arista Networks, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+#   Neither the name of Arista Networks nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL ARISTA NETWORKS
+# BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+# BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
+# IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#
+# Author = Anees Mohammed
+#
+
+import csv
+import threading
+import time
+
+
+# Cost of the EOS commands against the rate limit of a switch, relative to
+# a light show command. The commands not listed cost 1
+COMMAND_COSTS = {"enable": 0,
+                 "show running-config": 10,
+                 "show running-config section router bgp": 3,
+                 "show lldp neighbors detail": 2,
+                 "show ip bgp summary vrf all": 2,
+                 "show ipv6 bgp summary vrf all": 2}
+
+
+def parse_limits(values, option, kind):
+    """
+    Returns the dictionary of name to number of the NAME=NUMBER values of
+        a repeated command line option, such as --group-limit spine=4
+    Raises ValueError for any other text
+    """
+    limits = {}
+    for value in values or []:
+        name, separator, number = value.rpartition("=")
+        try:
+            limits[name.strip()] = kind(number)
+        except ValueError:
+            separator = ""
+        if not separator or not name.strip():
+            raise ValueError("%s takes NAME=NUMBER, not %s"
+                             % (option, value))
+    return limits
+
+
+def load_groups(file_name):
+    """
+    Returns the dictionary of switch to group read from a CSV file of
+        switch,group lines. Blank lines and lines starting with # are
+        skipped
+    """
+    groups = {}
+    with open(file_name) as readfile:
+        for row in csv.reader(readfile):
+            if not row or not row[0].strip() or \
+                    row[0].strip().startswith("#"):
+                continue
+            if len(row) < 2:
+                raise ValueError("%s: expected switch,group in %s"
+                                 % (file_name, ",".join(row)))
+            groups[row[0].strip()] = row[1].strip()
+    return groups
+
+
+class RequestScheduler(object):
+
+    """
+        Thread safe gate in front of every eAPI request of a run
+        A request to a switch waits until:
+            - fewer than max_requests requests are running, when set
+            - fewer than group_limits[group] requests to the switches of
+              its group are running, when the switch is in such a group
+            - the token bucket of the switch holds its cost, when rate is
+              set. The bucket refills at rate cost units per second up to
+              burst, and a request costing more than burst waits for a
+              full bucket and leaves it in debt, so heavy commands such as
+              show running-config slow down the next requests to the
+              switch instead of being refused
+    """
+
+    def __init__(self, max_requests=None, rate=None, burst=None,
+                 groups=None, group_limits=None, costs=None):
+        self.condition = threading.Condition()
+        self.max_requests = max_requests
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self.groups = groups or {}
+        self.group_limits = group_limits or {}
+        self.costs = dict(COMMAND_COSTS)
+        self.costs.update(costs or {})
+        self.running = 0
+        self.group_running = {}
+        self.buckets = {}
+
+    def cost(self, commands):
+        return sum(self.costs.get(command, 1) for command in commands)
+
+    def _tokens(self, switch, now):
+        tokens, last = self.buckets.get(switch, (self.burst, now))
+        return min(self.burst, tokens + (now - last) * self.rate)
+
+    def _try_acquire(self, switch, cost, now):
+        """
+        Takes a slot and the tokens of a request when all the limits
+            allow it. Returns 0 when it did, otherwise the seconds to
+            wait before trying again
+        Called with the condition held
+        """
+        if self.max_requests and self.running >= self.max_requests:
+            return 0.05
+        group = self.groups.get(switch)
+        limit = self.group_limits.get(group)
+        if limit and self.group_running.get(group, 0) >= limit:
+            return 0.05
+
+        if self.rate:
+            tokens = self._tokens(switch, now)
+            needed = min(cost, self.burst)
+            if tokens < needed:
+                return (needed - tokens) / self.rate
+            self.buckets[switch] = (tokens - cost, now)
+
+        self.running += 1
+        if group is not None:
+            self.group_running[group] = self.group_running.get(group, 0) + 1
+        return 0
+
+    def try_acquire(self, switch, commands):
+        """
+        Non blocking acquire, for the async eAPI client
+        Returns 0 when the request may be sent, and release must then be
+            called once it is done. Otherwise returns the seconds to wait
+            before trying again
+        """
+        with self.condition:
+            return self._try_acquire(switch, self.cost(commands), time.time())
+
+    def acquire(self, switch, commands):
+        """
+        Blocks until the request may be sent, release must then be called
+            once it is done
+        """
+        cost = self.cost(commands)
+        with self.condition:
+            while True:
+                wait = self._try_acquire(switch, cost, time.time())
+                if not wait:
+                    return
+                self.condition.wait(wait)
+
+    def release(self, switch):
+        with self.condition:
+            self.running -= 1
+            group = self.groups.get(switch)
+            if group is not None:
+                self.group_running[group] -= 1
+            self.condition.notify_all()
+
+
+class ScheduledNode(object):
+
+    """
+        Wraps an eAPI connection and sends every request through the
+            RequestScheduler
+    """
+
+    def __init__(self, node, scheduler, switch):
+        self.node = node
+        self.scheduler = scheduler
+        self.switch = switch
+
+    def execute(self, commands, encoding="json"):
+        self.scheduler.acquire(self.switch, commands)
+        try:
+            return self.node.execute(commands, encoding)
+        finally:
+            self.scheduler.release(self.switch)
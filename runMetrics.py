@@ -0,0 +1,229 @@
+# Copyright (c) 2016, Arista Networks, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+#   Neither the name of Arista Networks nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL ARISTA NETWORKS
+# BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+# BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
+# IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#
+# Author = Anees Mohammed
+#
+
+import json
+import socket
+import threading
+import time
+
+import pyeapi
+
+
+def percentile(samples, fraction):
+    """
+    Returns the nearest rank percentile of a sorted list of samples
+    """
+    if not samples:
+        return 0.0
+    rank = int(round(fraction * len(samples) + 0.5)) - 1
+    return samples[max(0, min(rank, len(samples) - 1))]
+
+
+class RunMetrics(object):
+
+    """
+        Thread safe recorder of where the time of a run goes
+        Records per switch the eAPI connect time, the round trip latency
+            and response size of every request, and the time spent
+            parsing the responses in each Use Case
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connects = []
+        self.requests = []
+        self.parses = []
+
+    def record_connect(self, switch, seconds):
+        with self.lock:
+            self.connects.append((switch, seconds))
+
+    def record_request(self, switch, commands, seconds, size):
+        with self.lock:
+            self.requests.append((switch, " | ".join(commands), seconds,
+                                  size))
+
+    def record_parse(self, phase, switch, seconds):
+        with self.lock:
+            self.parses.append((phase, switch, seconds))
+
+    @staticmethod
+    def _quantiles(values):
+        values = sorted(values)
+        return {"p50": percentile(values, 0.50),
+                "p95": percentile(values, 0.95),
+                "p99": percentile(values, 0.99),
+                "count": len(values),
+                "sum": sum(values)}
+
+    def summary(self, slowest=20):
+        """
+        Returns the p50/p95/p99 of every measurement, the total bytes
+            received and the slowest switches, by eAPI plus parse time
+        """
+        with self.lock:
+            connects = list(self.connects)
+            requests = list(self.requests)
+            parses = list(self.parses)
+
+        per_switch = {}
+        for switch, seconds in connects:
+            per_switch[switch] = per_switch.get(switch, 0.0) + seconds
+        for switch, _, seconds, _ in requests:
+            per_switch[switch] = per_switch.get(switch, 0.0) + seconds
+        for _, switch, seconds in parses:
+            per_switch[switch] = per_switch.get(switch, 0.0) + seconds
+
+        phases = {}
+        for phase, _, seconds in parses:
+            phases.setdefault(phase, []).append(seconds)
+
+        return {"switches": len(per_switch),
+                "total_bytes": sum(size for _, _, _, size in requests),
+                "connect_seconds": self._quantiles(
+                    [seconds for _, seconds in connects]),
+                "request_seconds": self._quantiles(
+                    [seconds for _, _, seconds, _ in requests]),
+                "response_bytes": self._quantiles(
+                    [size for _, _, _, size in requests]),
+                "parse_seconds": dict(
+                    (phase, self._quantiles(phases[phase]))
+                    for phase in phases),
+                "slowest_switches": [
+                    {"switch": switch, "seconds": seconds}
+                    for switch, seconds in sorted(
+                        per_switch.items(), key=lambda item: item[1],
+                        reverse=True)[:slowest]]}
+
+    def write_json(self, file_name):
+        with open(file_name, "w") as writefile:
+            json.dump(self.summary(), writefile, indent=2, sort_keys=True)
+
+    @staticmethod
+    def _prometheus_summary(name, help_text, quantiles, labels=""):
+        lines = []
+        if help_text:
+            lines.append("# HELP %s %s" % (name, help_text))
+            lines.append("# TYPE %s summary" % name)
+        separator = "," if labels else ""
+        for key, quantile in (("p50", "0.5"), ("p95", "0.95"),
+                              ("p99", "0.99")):
+            lines.append('%s{%s%squantile="%s"} %s' % (
+                name, labels, separator, quantile, repr(quantiles[key])))
+        braces = "{%s}" % labels if labels else ""
+        lines.append("%s_sum%s %s" % (name, braces, repr(quantiles["sum"])))
+        lines.append("%s_count%s %d" % (name, braces, quantiles["count"]))
+        return lines
+
+    def write_prometheus(self, file_name):
+        """
+        Writes the summary in the Prometheus text exposition format
+        """
+        summary = self.summary()
+        lines = []
+        lines += self._prometheus_summary(
+            "assessment_eapi_connect_seconds",
+            "Time to open the eAPI connection to a switch",
+            summary["connect_seconds"])
+        lines += self._prometheus_summary(
+            "assessment_eapi_request_seconds",
+            "Round trip time of an eAPI request",
+            summary["request_seconds"])
+        lines += self._prometheus_summary(
+            "assessment_eapi_response_bytes",
+            "Size of an eAPI response",
+            summary["response_bytes"])
+        help_text = "Time spent parsing the responses of one switch"
+        for phase in sorted(summary["parse_seconds"]):
+            lines += self._prometheus_summary(
+                "assessment_parse_seconds", help_text,
+                summary["parse_seconds"][phase], 'phase="%s"' % phase)
+            help_text = None
+        lines.append("# HELP assessment_eapi_bytes_total "
+                     "Bytes received from all the switches")
+        lines.append("# TYPE assessment_eapi_bytes_total counter")
+        lines.append("assessment_eapi_bytes_total %d"
+                     % summary["total_bytes"])
+        lines.append("# HELP assessment_switch_seconds "
+                     "eAPI and parse time of the slowest switches")
+        lines.append("# TYPE assessment_switch_seconds gauge")
+        for slow_switch in summary["slowest_switches"]:
+            lines.append('assessment_switch_seconds{switch="%s"} %s'
+                         % (slow_switch["switch"],
+                            repr(slow_switch["seconds"])))
+
+        with open(file_name, "w") as writefile:
+            writefile.write("\n".join(lines) + "\n")
+
+
+class MeteredNode(object):
+
+    """
+        Wraps a pyeapi connection and records the connect time, round
+            trip latency and response size of every request in RunMetrics
+    """
+
+    def __init__(self, node, metrics, switch):
+        self.node = node
+        self.metrics = metrics
+        self.switch = switch
+
+    def execute(self, commands, encoding="json"):
+        transport = getattr(self.node, "transport", None)
+        start = time.time()
+        if transport is not None and getattr(transport, "sock", 1) is None:
+            # Open the connection here so that its time is known, the
+            # request below reuses it
+            try:
+                transport.connect()
+            except (socket.error, OSError) as exc:
+                raise pyeapi.eapilib.ConnectionError(
+                    str(self.node),
+                    "Socket error during eAPI connection: %s" % str(exc))
+            self.metrics.record_connect(self.switch, time.time() - start)
+            # The round trip of the request starts once connected, so
+            # that the summary does not count the connect time twice
+            start = time.time()
+
+        try:
+            response = self.node.execute(commands, encoding)
+        except pyeapi.eapilib.EapiError:
+            # Failed and timed out requests count towards the latency
+            self.metrics.record_request(self.switch, commands,
+                                        time.time() - start, 0)
+            raise
+        self.metrics.record_request(self.switch, commands,
+                                    time.time() - start,
+                                    len(json.dumps(response)))
+        return response
@@ -0,0 +1,171 @@
+# Copyright (c) 2016, Arista Networks, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+#   Neither the name of Arista Networks nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL ARISTA NETWORKS
+# BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+# BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
+# IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#
+# Author = Anees Mohammed
+#
+
+import json
+import os
+
+
+# Keys of a BGP VRF status that do not point at a faulty neighbor
+BGP_SUMMARY_KEYS = set(["Status", "Configured Neighbors"])
+
+
+def bgp_has_issues(status):
+    """
+    Returns True if the BGP status of a switch shows a neighbor that is
+        not Established or a VRF without operational neighbors
+    """
+    if not isinstance(status, dict):
+        return False
+    for vrf_status in status.values():
+        if set(vrf_status) - BGP_SUMMARY_KEYS:
+            return True
+        if str(vrf_status.get("Status", "")).startswith("There are no"):
+            return True
+    return False
+
+
+def mlag_has_issues(status):
+    """
+    Returns True if the MLAG status of a switch shows an inactive control
+        plane or port channels that are not Active-full
+    """
+    if not isinstance(status, dict):
+        return False
+    return ("MLAG Inactive Port Channels" in status or
+            "MLAG Active-partial Port Channels" in status or
+            status.get("MLAG Control Plane") != "MLAG Control Plane is active")
+
+
+def native_strings(value):
+    """
+    Returns value with the unicode strings json.load gives back turned
+        into str, so that restored results print like fresh ones
+    """
+    if isinstance(value, unicode):
+        return value.encode("utf-8")
+    if isinstance(value, list):
+        return [native_strings(item) for item in value]
+    if isinstance(value, dict):
+        return dict((native_strings(key), native_strings(item))
+                    for key, item in value.items())
+    return value
+
+
+def load_switches(file_name):
+    """
+    Returns the per switch dictionary saved by save_switches in
+        file_name, or None if the file does not exist
+    """
+    if not os.path.exists(file_name):
+        return None
+    with open(file_name) as readfile:
+        return native_strings(json.load(readfile)["switches"])
+
+
+def save_switches(file_name, switches):
+    """
+    Saves a per switch dictionary in file_name. It is written to a
+        temporary file first, so that an interrupted run never leaves a
+        truncated file
+    """
+    temporary_file = file_name + ".tmp"
+    with open(temporary_file, "w") as writefile:
+        json.dump({"version": 1, "switches": switches}, writefile,
+                  sort_keys=True)
+    os.rename(temporary_file, file_name)
+
+
+class RunState(object):
+
+    """
+        Per switch results of the last run, saved in a JSON file
+        Holds for every switch its configuration hash, LLDP neighbor set,
+            hostname, topology edges, BGP, MLAG and other check results
+            and the eAPI errors of the run. The incremental mode compares
+            the new fingerprints with it to find the switches to validate
+            again
+    """
+
+    def __init__(self, switches=None):
+        self.switches = switches if switches is not None else {}
+
+    @classmethod
+    def load(cls, file_name):
+        """
+        Returns the state saved in file_name, or an empty state if the
+            file does not exist
+        """
+        return cls(load_switches(file_name))
+
+    def save(self, file_name):
+        save_switches(file_name, self.switches)
+
+    def record(self, switch, fingerprint, hostname=None, edges=None,
+               bgp=None, bgp_payload=0, bgp_peers=None, mlag=None,
+               checks=None, errors=None):
+        config_hash, lldp = fingerprint
+        self.switches[switch] = {"config_hash": config_hash,
+                                 "lldp": lldp,
+                                 "hostname": hostname,
+                                 "edges": edges or [],
+                                 "bgp": bgp,
+                                 "bgp_payload": bgp_payload,
+                                 "bgp_peers": bgp_peers or [],
+                                 "mlag": mlag,
+                                 "checks": checks or {},
+                                 "errors": errors or {}}
+
+    def unchanged(self, fingerprints):
+        """
+        Returns the switches whose configuration hash and LLDP neighbors
+            match the previous run and that had no eAPI error, BGP issue,
+            MLAG issue or other check result in it
+        fingerprints is a dictionary of switch to (config hash, LLDP
+            neighbors), switches missing from it are never unchanged
+        """
+        unchanged = []
+        for switch in fingerprints:
+            previous = self.switches.get(switch)
+            if previous is None or previous["errors"] or \
+                    previous["hostname"] is None:
+                continue
+            if bgp_has_issues(previous["bgp"]) or \
+                    mlag_has_issues(previous["mlag"]) or \
+                    any(previous.get("checks", {}).values()):
+                continue
+            config_hash, lldp = fingerprints[switch]
+            if previous["config_hash"] == config_hash and \
+                    previous["lldp"] == lldp:
+                unchanged.append(switch)
+        return unchanged
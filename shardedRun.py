@@ -0,0 +1,124 @@
+# Copyright (c) 2016, Arista Networks, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+#   Neither the name of Arista Networks nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL ARISTA NETWORKS
+# BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+# BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
+# IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#
+# Author = Anees Mohammed
+#
+
+
+"""
+    Sharded runs of the Assessment Tool
+
+    The inventory is split in N shards. Each shard is assessed by its own
+    process, on this host or on other hosts, and saves the results of its
+    switches in a partial file, in the format of the --state file. The
+    merge step combines the partial files and writes one report and one
+    topology from them, without connecting to the switches.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from runState import RunState
+
+
+def parse_shard(value):
+    """
+    Returns (shard, shards) from the "I/N" text of --shard, where the
+        shards are numbered from 1 to N
+    Raises ValueError for any other text
+    """
+    shard, shards = [int(number) for number in value.split("/")]
+    if not 1 <= shard <= shards:
+        raise ValueError(value)
+    return shard, shards
+
+
+def shard_switches(switches, shard, shards):
+    """
+    Returns the switches of one shard, every shards-th switch of the
+        list starting at the shard number, so that every invocation
+        given the same inventory picks the same switches
+    """
+    return switches[shard - 1::shards]
+
+
+def merge_partials(file_names):
+    """
+    Returns the RunState holding the switches of all the partial files
+    A switch found in more than one file keeps the results of the last
+        file it is found in
+    """
+    merged = RunState()
+    for file_name in file_names:
+        if not os.path.exists(file_name):
+            raise IOError("partial result file %s not found" % file_name)
+        merged.switches.update(RunState.load(file_name).switches)
+    return merged
+
+
+def run_shards(tool, tool_args, shards, environment=None):
+    """
+    Runs the tool once per shard as child processes of this one and
+        returns the RunState merged from their partial files
+    Every child runs in its own directory of a temporary directory, so
+        that their reports do not overwrite each other, and its output
+        goes to shard-<I>.log there. The directory is removed when all
+        the children succeed and kept for their logs otherwise
+    """
+    directory = tempfile.mkdtemp(prefix="assessment-shards-")
+    children = []
+    for shard in range(1, shards + 1):
+        shard_directory = os.path.join(directory, "shard-%d" % shard)
+        os.mkdir(shard_directory)
+        partial = os.path.join(directory, "shard-%d.json" % shard)
+        log = open(os.path.join(directory, "shard-%d.log" % shard), "w")
+        children.append((shard, partial, log, subprocess.Popen(
+            [sys.executable, tool] + tool_args +
+            ["--shard", "%d/%d" % (shard, shards), "--partial", partial],
+            cwd=shard_directory, env=environment, stdout=log,
+            stderr=subprocess.STDOUT)))
+
+    failed = []
+    for shard, partial, log, child in children:
+        if child.wait() != 0:
+            failed.append(shard)
+        log.close()
+    if failed:
+        raise RuntimeError("shards %s failed, see their logs in %s"
+                           % (", ".join(str(shard) for shard in failed),
+                              directory))
+
+    merged = merge_partials([partial for _, partial, _, _ in children])
+    shutil.rmtree(directory)
+    return merged
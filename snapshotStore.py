@@ -0,0 +1,176 @@
+# Copyright (c) 2016, Arista Networks, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+#   Neither the name of Arista Networks nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL ARISTA NETWORKS
+# BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+# BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
+# IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#
+# Author = Anees Mohammed
+#
+
+import errno
+import gzip
+import json
+import os
+import re
+import time
+
+import pyeapi
+
+
+class SnapshotStore(object):
+
+    """
+        On disk store of raw eAPI responses
+        Every response is saved in its own compressed file:
+            <directory>/<switch>/<command>.json.gz
+        The file holds the switch, the command, the capture timestamp and
+            either the command result or the error raised by the switch
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    @staticmethod
+    def _file_name(command):
+        return re.sub(r"[^A-Za-z0-9]+", "_", command).strip("_") + ".json.gz"
+
+    def _path(self, switch, command):
+        return os.path.join(self.directory, switch, self._file_name(command))
+
+    def save(self, switch, commands, response):
+        """
+        Saves the eAPI response of a list of commands sent to the switch
+        response is either the eAPI response dictionary or the
+            ConnectionError/CommandError raised by the request
+        """
+        try:
+            os.makedirs(os.path.join(self.directory, switch))
+        except OSError as exc:
+            if exc.errno != errno.EEXIST:
+                raise
+
+        timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        for position, command in enumerate(commands):
+            record = {"switch": switch,
+                      "command": command,
+                      "timestamp": timestamp}
+            if isinstance(response, pyeapi.eapilib.CommandError):
+                record["error"] = {"type": "CommandError",
+                                   "code": response.error_code,
+                                   "message": response.error_text,
+                                   "command_error": response.command_error}
+            elif isinstance(response, Exception):
+                record["error"] = {"type": "ConnectionError",
+                                   "message": str(response)}
+            else:
+                record["result"] = response["result"][position]
+
+            snapshot_file = gzip.open(self._path(switch, command), "wb")
+            try:
+                snapshot_file.write(json.dumps(record))
+            finally:
+                snapshot_file.close()
+
+    def load(self, switch, command):
+        """
+        Returns the result saved for the command
+        Raises the ConnectionError/CommandError saved for the command, or
+            a CommandError if the command is not in the snapshot
+        """
+        try:
+            snapshot_file = gzip.open(self._path(switch, command), "rb")
+        except IOError:
+            raise pyeapi.eapilib.CommandError(
+                1002, "%s is not in the snapshot of this switch" % command)
+        try:
+            record = json.loads(snapshot_file.read())
+        finally:
+            snapshot_file.close()
+
+        if "error" not in record:
+            return record["result"]
+
+        error = record["error"]
+        if error["type"] == "CommandError":
+            raise pyeapi.eapilib.CommandError(
+                error["code"], error["message"],
+                command_error=error["command_error"])
+        raise pyeapi.eapilib.ConnectionError("snapshot", error["message"])
+
+    def switches(self):
+        """
+        Returns the list of switches found in the snapshot directory
+        """
+        return sorted(name for name in os.listdir(self.directory)
+                      if os.path.isdir(os.path.join(self.directory, name)))
+
+    def nodes(self):
+        """
+        Returns a dictionary of switch to SnapshotNode, ready to be used
+            by the Use Cases in place of the eAPI connections
+        """
+        return dict((switch, SnapshotNode(self, switch))
+                    for switch in self.switches())
+
+
+class RecordingNode(object):
+
+    """
+        Wraps an eAPI connection and saves every response in the
+            SnapshotStore before handing it back
+    """
+
+    def __init__(self, node, store, switch):
+        self.node = node
+        self.store = store
+        self.switch = switch
+
+    def execute(self, commands, encoding="json"):
+        try:
+            response = self.node.execute(commands, encoding)
+        except pyeapi.eapilib.EapiError as exc:
+            self.store.save(self.switch, commands, exc)
+            raise
+        self.store.save(self.switch, commands, response)
+        return response
+
+
+class SnapshotNode(object):
+
+    """
+        Answers execute() calls from a SnapshotStore without touching
+            the network
+    """
+
+    def __init__(self, store, switch):
+        self.store = store
+        self.switch = switch
+
+    def execute(self, commands, encoding="json"):
+        return {"result": [self.store.load(self.switch, command)
+                           for command in commands]}
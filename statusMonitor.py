@@ -0,0 +1,353 @@
+# Copyright (c) 2016, Arista Networks, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+#   Neither the name of Arista Networks nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL ARISTA NETWORKS
+# BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+# BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
+# IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#
+# Author = Anees Mohammed
+#
+
+"""
+    Continuous BGP and MLAG monitoring with change only reporting
+
+    Re-runs the BGP and MLAG checks of the Assessment Tool on every switch
+    every --interval seconds. Each switch keeps its own jittered schedule,
+    so the fleet is not polled all at once. The last known state of every
+    switch is kept in memory and only the state transitions are reported,
+    such as a BGP neighbor leaving Established or an MLAG port channel
+    going Inactive. The first poll of a switch records its baseline.
+"""
+
+import argparse
+import heapq
+import json
+import os
+import random
+import sys
+import time
+
+from networkAssessmentComponents import Collector, BgpValidate, MlagValidate
+from requestScheduler import RequestScheduler, load_groups, parse_limits
+from switchHealth import CircuitBreaker
+
+
+def flatten_status(phase, status):
+    """
+    Returns the status of one switch for a phase as a dictionary of
+        item to value, where item is the tuple of keys leading to the value
+    """
+    if not isinstance(status, dict):
+        return {(phase, "Status"): status}
+    items = {}
+    for key, value in status.items():
+        if isinstance(value, dict):
+            for item, item_value in flatten_status(phase, value).items():
+                items[(phase, key) + item[1:]] = item_value
+        else:
+            items[(phase, key)] = value
+    return items
+
+
+class StatusTracker(object):
+
+    """
+        Last known BGP and MLAG state of every switch
+        update() replaces the state of a phase of one switch and returns
+            the transitions from the previous state
+    """
+
+    def __init__(self):
+        self.states = {}
+
+    def update(self, switch, phase, items):
+        """
+        Returns the list of (item, previous value, current value) for the
+            items of the phase that changed, appeared or disappeared
+        Nothing is returned the first time the phase of a switch is
+            seen, that state is its baseline
+        """
+        state = self.states.setdefault(switch, {})
+        previous = state.get(phase)
+        state[phase] = items
+        if previous is None:
+            return []
+
+        transitions = []
+        for item in sorted(set(previous) | set(items)):
+            if previous.get(item) != items.get(item):
+                transitions.append((item, previous.get(item),
+                                    items.get(item)))
+        return transitions
+
+
+class Monitor(object):
+
+    """
+        Polls the switches on their own schedule and reports the state
+            transitions to the console and to an NDJSON events file
+        Switches that are due within batch_window seconds of each other
+            are checked together, with one batched eAPI request per switch
+        Every request goes through the scheduler, when given, which keeps
+            the load on the switches within its limits for as long as the
+            monitor runs. Within one check, a switch failing
+            failure_threshold times in a row is not retried
+    """
+
+    def __init__(self, switches, username, password, interval=60,
+                 jitter=0.1, workers=10, eapi_client="pyeapi",
+                 transport="https", port=None, timeout=30, retries=2,
+                 events=None, batch_window=1.0, scheduler=None,
+                 failure_threshold=3):
+        self.switches = switches
+        self.username = username
+        self.password = password
+        self.interval = interval
+        self.jitter = jitter
+        self.workers = workers
+        self.eapi_client = eapi_client
+        self.transport = transport
+        self.port = port
+        self.timeout = timeout
+        self.retries = retries
+        self.events = events
+        self.batch_window = batch_window
+        self.scheduler = scheduler
+        self.failure_threshold = failure_threshold
+        self.tracker = StatusTracker()
+
+    def _next_poll(self, now):
+        return now + self.interval * random.uniform(1 - self.jitter,
+                                                     1 + self.jitter)
+
+    def run(self, duration=None):
+        """
+        Runs the schedule for duration seconds, or forever
+        The first poll of every switch is spread over one interval
+        """
+        start = time.time()
+        schedule = [(start + random.uniform(0, self.interval), switch)
+                    for switch in self.switches]
+        heapq.heapify(schedule)
+
+        while schedule:
+            due_time = schedule[0][0]
+            if duration is not None and due_time > start + duration:
+                break
+            time.sleep(max(0.0, due_time - time.time()))
+
+            batch = []
+            while schedule and \
+                    schedule[0][0] <= time.time() + self.batch_window:
+                batch.append(heapq.heappop(schedule)[1])
+
+            self.check(batch)
+
+            now = time.time()
+            for switch in batch:
+                heapq.heappush(schedule, (self._next_poll(now), switch))
+
+    def check(self, switches):
+        """
+        Runs the BGP and MLAG checks on the switches and reports the
+            transitions from their previous state
+        """
+        # A switch skipped by the breaker is polled again at its next
+        # check, so the breaker only lives for one check
+        collector = Collector(switches, self.username, self.password,
+                              self.workers, self.eapi_client,
+                              transport=self.transport, port=self.port,
+                              timeout=self.timeout, retries=self.retries,
+                              breaker=CircuitBreaker(self.failure_threshold),
+                              scheduler=self.scheduler)
+        collector.collect([BgpValidate, MlagValidate])
+        nodes = collector.get_nodes()
+
+        bgp = BgpValidate(switches, self.username, self.password,
+                          self.workers, self.eapi_client, nodes)
+        bgp.bgp_validate()
+        mlag = MlagValidate(switches, self.username, self.password,
+                            self.workers, self.eapi_client, nodes)
+        mlag.mlag_validate()
+
+        for switch in switches:
+            # eAPI errors are tracked on their own, so that the BGP and
+            # MLAG states of an unreachable switch are kept until it
+            # answers again
+            errors = sorted(set(use_case.errors[switch]
+                                for use_case in (bgp, mlag)
+                                if switch in use_case.errors))
+            self._report(switch, "eapi", {("eapi", "Status"):
+                                          "; ".join(errors)}
+                         if errors else {})
+            if switch not in bgp.errors:
+                self._report(switch, "bgp", flatten_status(
+                    "bgp", bgp.bgp_status.get(switch, {})))
+            if switch not in mlag.errors:
+                self._report(switch, "mlag", flatten_status(
+                    "mlag", mlag.mlag_status.get(switch, {})))
+
+    def _report(self, switch, phase, items):
+        timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        for item, previous, current in self.tracker.update(switch, phase,
+                                                            items):
+            print "%s %s %s %s: %s -> %s" % (
+                timestamp, switch, phase, " / ".join(item[1:]),
+                "-" if previous is None else previous,
+                "-" if current is None else current)
+            if self.events is not None:
+                self.events.write(json.dumps({"timestamp": timestamp,
+                                              "switch": switch,
+                                              "phase": phase,
+                                              "item": list(item[1:]),
+                                              "previous": previous,
+                                              "current": current}) + "\n")
+                self.events.flush()
+        sys.stdout.flush()
+
+
+def read_credentials(credentials_file=None):
+    """
+    Returns the eAPI username and password, read from credentials_file
+        (username on the first line, password on the second) or from the
+        EAPI_USERNAME and EAPI_PASSWORD environment variables
+    """
+    if credentials_file is not None:
+        with open(credentials_file) as readfile:
+            lines = [line.rstrip("\r\n") for line in readfile]
+        if len(lines) < 2:
+            raise SystemExit("%s must hold the username and the password "
+                             "on two lines" % credentials_file)
+        return lines[0], lines[1]
+
+    username = os.environ.get("EAPI_USERNAME")
+    password = os.environ.get("EAPI_PASSWORD")
+    if not username or not password:
+        raise SystemExit("Set EAPI_USERNAME and EAPI_PASSWORD or use "
+                         "--credentials-file")
+    return username, password
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Continuous BGP and MLAG monitoring")
+    parser.add_argument("--switches", default="switches.txt",
+                        help="file with the switch IP addresses "
+                             "(default: switches.txt)")
+    parser.add_argument("--credentials-file", metavar="FILE",
+                        help="file with the username and the password on "
+                             "two lines (default: EAPI_USERNAME and "
+                             "EAPI_PASSWORD environment variables)")
+    parser.add_argument("--interval", type=float, default=60,
+                        help="seconds between two checks of a switch "
+                             "(default: 60)")
+    parser.add_argument("--jitter", type=float, default=0.1,
+                        help="random fraction of the interval added or "
+                             "removed for every check (default: 0.1)")
+    parser.add_argument("--duration", type=float,
+                        help="stop after this many seconds "
+                             "(default: run forever)")
+    parser.add_argument("--events", metavar="FILE",
+                        help="append the transitions to FILE as NDJSON")
+    parser.add_argument("--workers", type=int, default=10)
+    parser.add_argument("--eapi-client", choices=["pyeapi", "async"],
+                        default="pyeapi")
+    parser.add_argument("--eapi-transport", choices=["https", "http"],
+                        default="https")
+    parser.add_argument("--eapi-port", type=int)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--failure-threshold", type=int, default=3,
+                        help="connection failures in a row after which a "
+                             "switch is skipped until its next check "
+                             "(default: 3)")
+    parser.add_argument("--max-requests", type=int,
+                        help="eAPI requests running at the same time across "
+                             "all the switches (default: no limit other "
+                             "than --workers)")
+    parser.add_argument("--switch-rate", type=float,
+                        help="cost units per second each switch may "
+                             "receive, a light show command costs 1 "
+                             "(default: no limit)")
+    parser.add_argument("--switch-burst", type=float,
+                        help="cost units a switch may receive at once "
+                             "(default: --switch-rate)")
+    parser.add_argument("--groups", metavar="FILE",
+                        help="CSV file of switch,group lines, for "
+                             "--group-limit")
+    parser.add_argument("--group-limit", metavar="GROUP=N",
+                        action="append",
+                        help="eAPI requests running at the same time to "
+                             "the switches of a group of --groups, such as "
+                             "spine=4, can be repeated")
+    parser.add_argument("--command-cost", metavar="COMMAND=COST",
+                        action="append",
+                        help="cost of an EOS command against --switch-rate, "
+                             "can be repeated")
+    args = parser.parse_args()
+    if args.switch_rate is not None and args.switch_rate <= 0:
+        parser.error("--switch-rate must be more than 0")
+    if args.group_limit and not args.groups:
+        parser.error("--group-limit needs the --groups file")
+    try:
+        group_limits = parse_limits(args.group_limit, "--group-limit", int)
+        command_costs = parse_limits(args.command_cost, "--command-cost",
+                                     float)
+        groups = load_groups(args.groups) if args.groups else {}
+    except (IOError, ValueError) as exc:
+        parser.error(str(exc))
+    scheduler = RequestScheduler(args.max_requests, args.switch_rate,
+                                 args.switch_burst, groups, group_limits,
+                                 command_costs)
+
+    username, password = read_credentials(args.credentials_file)
+
+    switches = []
+    with open(args.switches) as readfile:
+        for line in readfile:
+            if line.strip():
+                switches.append(line.strip())
+
+    events = open(args.events, "a") if args.events else None
+    monitor = Monitor(switches, username, password, args.interval,
+                      args.jitter, args.workers, args.eapi_client,
+                      args.eapi_transport, args.eapi_port, args.timeout,
+                      args.retries, events, scheduler=scheduler,
+                      failure_threshold=args.failure_threshold)
+    print "Monitoring %d switches every %d seconds" % (len(switches),
+                                                       args.interval)
+    try:
+        monitor.run(args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if events is not None:
+            events.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# Copyright (c) 2016, Arista Networks, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+#   Neither the name of Arista Networks nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL ARISTA NETWORKS
+# BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+# BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
+# IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#
+# Author = Anees Mohammed
+#
+
+import httplib
+import random
+import socket
+import threading
+import time
+
+import pyeapi
+
+
+class CircuitBreaker(object):
+
+    """
+        Per run record of the switches that keep failing
+        A switch is marked unhealthy after threshold eAPI connection
+            failures in a row. The later requests and phases skip an
+            unhealthy switch at once instead of waiting for it to time out
+            again. A successful request resets the count
+    """
+
+    def __init__(self, threshold=3):
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.failures = {}
+        self.unhealthy = set()
+
+    def allow(self, switch):
+        with self.lock:
+            return switch not in self.unhealthy
+
+    def record_success(self, switch):
+        with self.lock:
+            self.failures.pop(switch, None)
+
+    def record_failure(self, switch):
+        with self.lock:
+            self.failures[switch] = self.failures.get(switch, 0) + 1
+            if self.failures[switch] >= self.threshold:
+                self.unhealthy.add(switch)
+
+    def get_unhealthy(self):
+        with self.lock:
+            return sorted(self.unhealthy)
+
+
+def backoff_delay(attempt, backoff):
+    """
+    Returns the full jitter exponential backoff before retry number
+        attempt (0 for the first retry), so that the retries of many
+        switches failing together do not arrive at the same time
+    """
+    return random.uniform(0, backoff * (2 ** attempt))
+
+
+class RetryingNode(object):
+
+    """
+        eAPI connection that retries the requests failing with a
+            ConnectionError, with jittered exponential backoff
+        connect is called to open a fresh connection for every attempt,
+            so a connection left broken by a timeout is never reused
+        CommandErrors are answers from the switch and are not retried
+        Raw httplib and socket errors, which pyeapi lets through on some
+            broken responses, are raised as ConnectionError
+    """
+
+    def __init__(self, connect, switch, retries=2, backoff=0.5,
+                 breaker=None):
+        self.connect = connect
+        self.switch = switch
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker
+        self.node = None
+
+    def _unhealthy(self):
+        return pyeapi.eapilib.ConnectionError(
+            self.switch, "eAPI of the switch failed too many times")
+
+    def execute(self, commands, encoding="json"):
+        attempt = 0
+        while True:
+            if self.breaker is not None and \
+                    not self.breaker.allow(self.switch):
+                raise self._unhealthy()
+
+            if self.node is None:
+                self.node = self.connect()
+            try:
+                try:
+                    response = self.node.execute(commands, encoding)
+                except (httplib.HTTPException, socket.error) as exc:
+                    raise pyeapi.eapilib.ConnectionError(
+                        self.switch, "eAPI request failed: %r" % exc)
+            except pyeapi.eapilib.ConnectionError:
+                self.node = None
+                if self.breaker is not None:
+                    self.breaker.record_failure(self.switch)
+                if attempt >= self.retries:
+                    raise
+                time.sleep(backoff_delay(attempt, self.backoff))
+                attempt += 1
+                continue
+
+            if self.breaker is not None:
+                self.breaker.record_success(self.switch)
+            return response
@@ -0,0 +1,163 @@
+# Copyright (c) 2016, Arista Networks, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#   Redistributions of source code must retain the above copyright notice,
+#   this list of conditions and the following disclaimer.
+#
+#   Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+#   Neither the name of Arista Networks nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL ARISTA NETWORKS
+# BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+# BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
+# IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#
+# Author = Anees Mohammed
+#
+
+"""
+    Writers of the topology links to the files used by other tools
+
+    Every writer streams the links of a LinkTable to its file, one node or
+    link at a time, without building the whole document in memory.
+"""
+
+import json
+from xml.sax.saxutils import escape, quoteattr
+
+
+def _nodes(links):
+    """
+    Returns the sorted device names found in the links
+    """
+    nodes = set()
+    for device, _, neighbor, _, _ in links:
+        nodes.add(device)
+        nodes.add(neighbor)
+    return sorted(nodes)
+
+
+def _text(value):
+    if isinstance(value, unicode):
+        return value.encode("utf-8")
+    return str(value)
+
+
+def _edge_id(device, port, neighbor, neighbor_port):
+    return neighbor + "_" + device + "_" + neighbor_port + port
+
+
+def write_graphml(links, file_name):
+    """
+    Writes the links as GraphML, the format opened by Cytoscape
+    """
+    with open(file_name, "w") as writefile:
+        writefile.write(
+            "<?xml version='1.0' encoding='utf-8'?>\n"
+            '<graphml xmlns="http://graphml.graphdrawing.org/xmlns" '
+            'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+            'xsi:schemaLocation="http://graphml.graphdrawing.org/xmlns '
+            'http://graphml.graphdrawing.org/xmlns/1.0/graphml.xsd">\n'
+            '  <key attr.name="port" attr.type="string" for="edge" '
+            'id="d0" />\n'
+            '  <key attr.name="neighborPort" attr.type="string" '
+            'for="edge" id="d1" />\n'
+            '  <key attr.name="speed" attr.type="int" for="edge" '
+            'id="d2" />\n'
+            '  <graph edgedefault="undirected">\n')
+        for node in _nodes(links):
+            writefile.write('    <node id=%s />\n' % quoteattr(_text(node)))
+        for device, port, neighbor, neighbor_port, speed in links:
+            writefile.write(
+                '    <edge id=%s source=%s target=%s>\n'
+                '      <data key="d0">%s</data>\n'
+                '      <data key="d1">%s</data>\n'
+                '      <data key="d2">%s</data>\n'
+                '    </edge>\n' % (
+                    quoteattr(_text(_edge_id(device, port, neighbor,
+                                             neighbor_port))),
+                    quoteattr(_text(device)), quoteattr(_text(neighbor)),
+                    escape(_text(port)), escape(_text(neighbor_port)),
+                    escape(_text(speed))))
+        writefile.write("  </graph>\n</graphml>\n")
+
+
+def write_cytoscape_json(links, file_name):
+    """
+    Writes the links in the Cytoscape.js elements JSON format
+    """
+    with open(file_name, "w") as writefile:
+        writefile.write('{"elements": {"nodes": [')
+        separator = "\n"
+        for node in _nodes(links):
+            writefile.write(separator + json.dumps(
+                {"data": {"id": node, "name": node}}))
+            separator = ",\n"
+        writefile.write('],\n"edges": [')
+        separator = "\n"
+        for device, port, neighbor, neighbor_port, speed in links:
+            writefile.write(separator + json.dumps(
+                {"data": {"id": _edge_id(device, port, neighbor,
+                                         neighbor_port),
+                          "source": device,
+                          "target": neighbor,
+                          "port": port,
+                          "neighborPort": neighbor_port,
+                          "speed": speed}}))
+            separator = ",\n"
+        writefile.write("]}}\n")
+
+
+def write_edge_list(links, file_name):
+    """
+    Writes the links as a tab separated edge list with a header line
+    """
+    with open(file_name, "w") as writefile:
+        writefile.write("device\tport\tneighbor\tneighborPort\tspeed\n")
+        for link in links:
+            writefile.write("\t".join(_text(value) for value in link) + "\n")
+
+
+def write_parquet(links, file_name):
+    """
+    Writes the links as a Parquet table with one column per field
+    Needs the optional pyarrow module, imported only here
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("The parquet topology format needs the pyarrow "
+                           "module, install it with: pip install pyarrow")
+    columns = [[], [], [], [], []]
+    for link in links:
+        for column, value in zip(columns, link):
+            column.append(value)
+    table = pyarrow.Table.from_arrays(
+        [pyarrow.array(column) for column in columns],
+        ["device", "port", "neighbor", "neighborPort", "speed"])
+    pyarrow.parquet.write_table(table, file_name)
+
+
+# Topology file and writer of every format, by command line name
+EXPORTERS = {"graphml": ("network.graphml", write_graphml),
+             "cytoscape": ("network.cyjs", write_cytoscape_json),
+             "edgelist": ("network.tsv", write_edge_list),
+             "parquet": ("network.parquet", write_parquet)}